@@ -1,26 +1,183 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, abort, render_template, request, redirect, url_for, flash, session, jsonify, make_response, Response, send_from_directory, stream_with_context
+from flask import before_render_template, g, has_request_context, template_rendered
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.exceptions import TooManyRequests
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+import click
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import math
+import mimetypes
 import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from types import SimpleNamespace
 import urllib.parse
+import uuid
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from assets import available_encodings, build_assets, load_manifest
+from audio import TranscodeError, build_transcoder, transcode_music
+from cache import LRUCache
+from catalog import Catalog
+from compression import DEFAULT_MIMETYPES, CompressionMiddleware
+from database import engine_options, normalize_database_url
+from fragments import FragmentCacheExtension
+from images import ImageProcessingError, process_logo
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+import migrations
+from notifications import NotificationError, OutboxWorker, backoff_delay, build_senders
+from ratelimit import FileBackend, MemoryBackend, RateLimiter
+from search import SEARCH_INDEXES, create_index, delete_rows, index_rows, search_ids, search_terms
+from writer import GroupCommitWriter
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(os.environ.get('DATABASE_URL', 'sqlite:///database.db'))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# How often (seconds) each worker re-checks the settings generation stamp
+app.config['SETTINGS_CACHE_CHECK_INTERVAL'] = float(os.environ.get('SETTINGS_CACHE_CHECK_INTERVAL', 5))
+
+# Product catalog data file, loaded once at startup
+app.config['CATALOG_FILE'] = os.environ.get('CATALOG_FILE', os.path.join(app.root_path, 'data', 'catalog.json'))
+
+# Rendered HTML cache for the public catalog pages
+app.config['PAGE_CACHE_SIZE'] = int(os.environ.get('PAGE_CACHE_SIZE', 64))
+
+# Rendered {% cache %} fragments of the shared layout (0 disables)
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get('FRAGMENT_CACHE_SIZE', 128))
+
+# Admin list sizes
+app.config['DASHBOARD_RECENT_LIMIT'] = 10
+app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+app.config['BULK_ACTION_LIMIT'] = 1000
+app.config['EXPORT_BATCH_SIZE'] = 1000
+
+# Retention: `flask archive-data` moves completed/cancelled orders and read messages
+# older than this many days into archive tables ('table') or JSONL.gz files ('file')
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+app.config['ARCHIVE_TARGET'] = os.environ.get('ARCHIVE_TARGET', 'table')
+app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', os.path.join(app.instance_path, 'archive'))
+app.config['ARCHIVE_CHUNK_SIZE'] = int(os.environ.get('ARCHIVE_CHUNK_SIZE', 500))
+
+ORDER_STATUSES = ('pending', 'completed', 'cancelled')
+
+# Read the dashboard totals from the materialized per-status order counters instead of
+# aggregating on each view. The counters are kept up to date either way, so the flag
+# can be switched at any time without them going stale.
+app.config['ORDER_STATS_COUNTERS'] = os.environ.get('ORDER_STATS_COUNTERS', '').lower() in ('1', 'true', 'yes')
+
 # WhatsApp Configuration
 WHATSAPP_NUMBER = "263718456744"  # Your WhatsApp number
+app.config['WHATSAPP_NUMBER'] = WHATSAPP_NUMBER
+
+# Notification outbox
+# Comma separated list of whatsapp, email, webhook and stub; each needs its settings below
+app.config['NOTIFICATION_CHANNELS'] = os.environ.get('NOTIFICATION_CHANNELS', '')
+app.config['WHATSAPP_API_URL'] = os.environ.get('WHATSAPP_API_URL')
+app.config['WHATSAPP_API_TOKEN'] = os.environ.get('WHATSAPP_API_TOKEN')
+app.config['SMTP_HOST'] = os.environ.get('SMTP_HOST')
+app.config['SMTP_PORT'] = int(os.environ.get('SMTP_PORT', 587))
+app.config['SMTP_USERNAME'] = os.environ.get('SMTP_USERNAME')
+app.config['SMTP_PASSWORD'] = os.environ.get('SMTP_PASSWORD')
+app.config['NOTIFY_EMAIL_FROM'] = os.environ.get('NOTIFY_EMAIL_FROM')
+app.config['NOTIFY_EMAIL_TO'] = os.environ.get('NOTIFY_EMAIL_TO')
+app.config['NOTIFY_WEBHOOK_URL'] = os.environ.get('NOTIFY_WEBHOOK_URL')
+app.config['NOTIFY_WEBHOOK_TOKEN'] = os.environ.get('NOTIFY_WEBHOOK_TOKEN')
+# 'thread' drains the outbox inside each web worker, 'off' leaves it to `flask drain-outbox`
+app.config['NOTIFICATION_WORKER'] = os.environ.get('NOTIFICATION_WORKER', 'thread')
+app.config['OUTBOX_BATCH_SIZE'] = 20
+app.config['OUTBOX_MAX_ATTEMPTS'] = 8
+app.config['OUTBOX_LEASE_SECONDS'] = 120
+
+# Group commit: order and contact inserts are queued for one writer thread per
+# worker that commits them in batches, waiting at most GROUP_COMMIT_MAX_WAIT_MS
+app.config['GROUP_COMMIT'] = os.environ.get('GROUP_COMMIT', '').lower() in ('1', 'true', 'yes')
+app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 64))
+app.config['GROUP_COMMIT_MAX_WAIT_MS'] = float(os.environ.get('GROUP_COMMIT_MAX_WAIT_MS', 5))
+app.config['GROUP_COMMIT_TIMEOUT'] = 30
+
+# Uploaded media is post-processed off the request thread; 'inline' runs it during the request
+app.config['MEDIA_PROCESSING'] = os.environ.get('MEDIA_PROCESSING', 'background')
+# 'auto' uses ffmpeg when installed and serves the upload unchanged otherwise; 'stub' is for tests
+app.config['MUSIC_TRANSCODER'] = os.environ.get('MUSIC_TRANSCODER', 'auto')
+app.config['MUSIC_BITRATE'] = os.environ.get('MUSIC_BITRATE', '96k')
+# Transcoded music has a content hash in its name, so browsers may keep it for a year
+app.config['MUSIC_CACHE_MAX_AGE'] = 365 * 24 * 3600
+
+# Static assets: 'auto' serves minified, fingerprinted CSS/JS from static/dist and
+# builds them at startup when missing or stale; 'off' serves the source files
+app.config['STATIC_ASSETS'] = os.environ.get('STATIC_ASSETS', 'auto')
+app.config['STATIC_ASSET_MAX_AGE'] = 365 * 24 * 3600
+
+# Response compression (gzip, or brotli when installed) for text responses with a known size
+app.config['COMPRESSION'] = os.environ.get('COMPRESSION', '1').lower() in ('1', 'true', 'yes')
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+app.config['COMPRESSION_MIMETYPES'] = [t.strip() for t in os.environ.get('COMPRESSION_MIMETYPES', ','.join(DEFAULT_MIMETYPES)).split(',') if t.strip()]
+app.config['COMPRESSION_CACHE_SIZE'] = int(os.environ.get('COMPRESSION_CACHE_SIZE', 256))
+
+# Rate limits for unauthenticated POSTs: (requests, seconds) per client IP and route.
+# 'file' shares buckets between the workers on a host, 'memory' is per worker, 'off' disables.
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'file' if fcntl else 'memory')
+app.config['RATE_LIMIT_FILE'] = os.environ.get('RATE_LIMIT_FILE', os.path.join(app.instance_path, 'ratelimit.bin'))
+app.config['RATE_LIMITS'] = {
+    'submit_order': (10, 60),
+    'contact': (5, 60),
+    'admin_login': (5, 60),
+}
+# Number of reverse proxies in front of the app whose X-Forwarded-For/-Proto headers are trusted
+app.config['PROXY_COUNT'] = int(os.environ.get('PROXY_COUNT', 0))
+
+# Instrumentation: per-request timings feed /metrics, the Server-Timing header and log warnings
+app.config['INSTRUMENTATION'] = os.environ.get('INSTRUMENTATION', '1').lower() in ('1', 'true', 'yes')
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 500))
+# Warn when one request runs the same SQL statement this many times
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+# /metrics requires "Authorization: Bearer <token>" and is hidden (404) when no
+# token is set, unless METRICS_PUBLIC opts in to serving it unauthenticated
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['METRICS_PUBLIC'] = os.environ.get('METRICS_PUBLIC', '').lower() in ('1', 'true', 'yes')
 
 # Create upload folders if they don't exist
 os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'logos'), exist_ok=True)
 os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'music'), exist_ok=True)
 
+if app.config['PROXY_COUNT']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_COUNT'], x_proto=app.config['PROXY_COUNT'])
+if app.config['COMPRESSION']:
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, min_size=app.config['COMPRESSION_MIN_SIZE'],
+                                         mimetypes=app.config['COMPRESSION_MIMETYPES'],
+                                         cache_size=app.config['COMPRESSION_CACHE_SIZE'])
+
 db = SQLAlchemy(app)
 
 # Database Models
@@ -38,10 +195,43 @@ class Order(db.Model):
     phone = db.Column(db.String(20), nullable=False)
     product_type = db.Column(db.String(50), nullable=False)
     product_name = db.Column(db.String(100), nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price_cents = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.Text)
+    # One-time token from the order form, so a resubmitted form finds the order it already created
+    idempotency_key = db.Column(db.String(64))
+
+    # Keep in sync with the indexes created by migrations.py
+    __table_args__ = (
+        db.Index('ix_order_created_at_id', 'created_at', 'id'),
+        db.Index('ix_order_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ux_order_idempotency_key', 'idempotency_key', unique=True),
+    )
+
+    @property
+    def price(self):
+        return cents_to_decimal(self.price_cents)
+
+class OrderStats(db.Model):
+    status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue_cents = db.Column(db.Integer, nullable=False, default=0)
+
+class OrderRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.Date, nullable=False)
+    product_type = db.Column(db.String(50), nullable=False)
+    product_name = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue_cents = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('period', 'bucket_start', 'product_type', 'product_name', 'status',
+                            name='uq_order_rollup_bucket'),
+    )
 
 class ContactMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -52,10 +242,60 @@ class ContactMessage(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index('ix_contact_message_created_at_id', 'created_at', 'id'),
+        db.Index('ix_contact_message_read_created_at', 'read', 'created_at', 'id'),
+    )
+
+# Archive tables mirror the live columns and are only written by `flask archive-data`
+class ArchivedOrder(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    customer_name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(20), nullable=False)
+    product_type = db.Column(db.String(50), nullable=False)
+    product_name = db.Column(db.String(100), nullable=False)
+    price_cents = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    notes = db.Column(db.Text)
+    idempotency_key = db.Column(db.String(64))
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_archived_order_created_at_id', 'created_at', 'id'),)
+
+class ArchivedContactMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime)
+    read = db.Column(db.Boolean)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_archived_contact_message_created_at_id', 'created_at', 'id'),)
+
+class NotificationOutbox(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(20), nullable=False)
+    channel = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_outbox_status_next_attempt', 'status', 'next_attempt_at'),)
+
 class SiteSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     logo_path = db.Column(db.String(200))
+    logo_variants = db.Column(db.Text)
     background_music_path = db.Column(db.String(200))
+    music_stream_path = db.Column(db.String(200))
     music_enabled = db.Column(db.Boolean, default=False)
     site_name = db.Column(db.String(100), default='Ntando Mods')
     whatsapp_notifications = db.Column(db.Boolean, default=True)
@@ -70,29 +310,218 @@ class CustomFeature(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     order_position = db.Column(db.Integer, default=0)
 
-# Create tables
-with app.app_context():
+def cents_to_decimal(cents):
+    return Decimal(cents or 0).scaleb(-2)
+
+@app.template_filter('cents')
+def format_cents(cents):
+    return f"{cents_to_decimal(cents):.2f}"
+
+# Instrumentation
+# Each request collects its wall time, SQL statement count and time (from engine
+# events) and template render time (from Flask signals) in g._timing. The totals
+# go to the METRICS histograms, the optional Server-Timing header and the log
+# when a request is slow or repeats one statement often enough to look like N+1.
+METRICS = Registry()
+REQUESTS_TOTAL = METRICS.counter('http_requests_total', 'HTTP requests served.', ('endpoint', 'method', 'status'))
+REQUEST_DURATION = METRICS.histogram('http_request_duration_seconds', 'Request wall time.', ('endpoint',))
+REQUEST_QUERIES = METRICS.histogram('http_request_sql_queries', 'SQL statements per request.', ('endpoint',),
+                                    buckets=(0, 1, 2, 5, 10, 20, 50, 100))
+SQL_QUERIES_TOTAL = METRICS.counter('sql_queries_total', 'SQL statements executed.')
+SQL_DURATION = METRICS.histogram('sql_query_duration_seconds', 'SQL statement time.',
+                                 buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+TEMPLATE_DURATION = METRICS.histogram('template_render_duration_seconds', 'Template render time.', ('template',))
+
+def _request_timing():
+    return g.get('_timing') if has_request_context() else None
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to this request's Server-Timing entry `name`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = _request_timing()
+        if timing is not None:
+            timing['spans'][name] = timing['spans'].get(name, 0.0) + time.perf_counter() - started
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    SQL_QUERIES_TOTAL.inc()
+    SQL_DURATION.observe(elapsed)
+    timing = _request_timing()
+    if timing is not None:
+        timing['queries'] += 1
+        timing['query_time'] += elapsed
+        timing['statements'][statement] += 1
+
+def _handle_db_error(exception_context):
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+def _before_render_template(sender, template, context, **extra):
+    timing = _request_timing()
+    if timing is not None:
+        timing['render_started'].append(time.perf_counter())
+
+def _template_rendered(sender, template, context, **extra):
+    timing = _request_timing()
+    if timing is not None and timing['render_started']:
+        elapsed = time.perf_counter() - timing['render_started'].pop()
+        TEMPLATE_DURATION.observe(elapsed, (template.name or 'string',))
+        if not timing['render_started']:  # Only count the outermost render of nested ones
+            timing['render_time'] += elapsed
+
+def _start_request_timer():
+    g._timing = {'started': time.perf_counter(), 'queries': 0, 'query_time': 0.0, 'statements': Counter(),
+                 'render_started': [], 'render_time': 0.0, 'spans': {}}
+
+def _server_timing(timing, elapsed):
+    entries = [f'total;dur={elapsed * 1000:.1f}',
+               f'db;dur={timing["query_time"] * 1000:.1f};desc="{timing["queries"]} queries"',
+               f'render;dur={timing["render_time"] * 1000:.1f}']
+    entries += [f'{name};dur={duration * 1000:.1f}' for name, duration in timing['spans'].items()]
+    return ', '.join(entries)
+
+def _record_request(response):
+    timing = g.pop('_timing', None)
+    if timing is None:
+        return response
+    elapsed = time.perf_counter() - timing['started']
+    endpoint = request.endpoint or 'unmatched'
+    REQUESTS_TOTAL.inc(labels=(endpoint, request.method, str(response.status_code)))
+    REQUEST_DURATION.observe(elapsed, (endpoint,))
+    REQUEST_QUERIES.observe(timing['queries'], (endpoint,))
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = _server_timing(timing, elapsed)
+
+    if elapsed * 1000 >= app.config['SLOW_REQUEST_MS']:
+        app.logger.warning('Slow request %s %s: %.0f ms, %d queries in %.0f ms, templates %.0f ms',
+                           request.method, request.path, elapsed * 1000, timing['queries'],
+                           timing['query_time'] * 1000, timing['render_time'] * 1000)
+    if timing['statements']:
+        statement, count = timing['statements'].most_common(1)[0]
+        if count >= app.config['N_PLUS_ONE_THRESHOLD']:
+            app.logger.warning('Possible N+1 in %s %s: statement ran %d times: %s',
+                               request.method, request.path, count, ' '.join(statement.split())[:200])
+    return response
+
+if app.config['INSTRUMENTATION']:
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_db_error)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    # Registered before every other hook so the request timer covers them
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker process"""
+    token = app.config['METRICS_TOKEN']
+    if token:
+        # Compare bytes: compare_digest rejects non-ASCII str
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+            abort(403)
+    elif not app.config['METRICS_PUBLIC']:
+        abort(404)
+    return Response(METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+
+# Database initialization
+# Nothing touches the database at import time. init_db() runs from `flask init-db`
+# or lazily on the first request each worker serves; a file lock keeps workers
+# that boot together from racing on table creation and seeding.
+_initialized = False
+_init_lock = threading.Lock()
+
+@contextmanager
+def _init_file_lock():
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, 'init.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def init_db(admin_password='admin123'):
+    """Create tables, apply migrations and seed the default admin and settings rows"""
+    global _search_enabled
     db.create_all()
+    applied = migrations.upgrade(db.engine)
+    _search_enabled = None  # Migrations may have just created the search tables
+
     # Create default admin if not exists
     if not Admin.query.filter_by(username='admin').first():
-        admin = Admin(
+        db.session.add(Admin(
             username='admin',
-            password=generate_password_hash('admin123'),
+            password=generate_password_hash(admin_password),
             email='admin@ntandomods.com'
-        )
-        db.session.add(admin)
-        db.session.commit()
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
     
     # Create default site settings if not exists
     if not SiteSettings.query.first():
-        settings = SiteSettings()
-        db.session.add(settings)
+        db.session.add(SiteSettings())
         db.session.commit()
 
-# Helper function to send WhatsApp notification
-def send_whatsapp_notification(order):
-    """Generate WhatsApp message for new order"""
-    message = f"""🔔 *NEW ORDER RECEIVED*
+    # Backfill the counters and analytics rollups for orders placed before they
+    # existed; later status changes and deletes subtract from them
+    if not OrderStats.query.first() and Order.query.first():
+        rebuild_order_stats()
+    if not OrderRollup.query.first() and (Order.query.first() or ArchivedOrder.query.first()):
+        rebuild_order_rollups()
+    return applied
+
+def ensure_initialized():
+    """Run init_db() and load the static asset manifest once per process"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        with _init_file_lock():
+            init_db()
+            init_assets()
+        _initialized = True
+
+@app.cli.command('init-db')
+@click.option('--admin-password', default='admin123', show_default=True, help='Password for a newly created admin user.')
+def init_db_command(admin_password):
+    """Create tables, apply migrations and seed default rows."""
+    with _init_file_lock():
+        applied = init_db(admin_password)
+    for version, description in applied:
+        click.echo(f'Applied migration {version}: {description}')
+    click.echo('Database initialized.')
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Create missing tables and apply pending schema migrations."""
+    with _init_file_lock():
+        db.create_all()
+        applied = migrations.upgrade(db.engine)
+    for version, description in applied:
+        click.echo(f'Applied migration {version}: {description}')
+    click.echo('Database is up to date.' if not applied else f'Applied {len(applied)} migrations.')
+
+# Helper functions to build notification messages
+def format_order_message(order):
+    """Build the notification text for a new order"""
+    return f"""🔔 *NEW ORDER RECEIVED*
 
 📋 *Order Details*
 ━━━━━━━━━━━━━━━
@@ -115,11 +544,519 @@ def send_whatsapp_notification(order):
 ━━━━━━━━━━━━━━━
 Please contact the customer to confirm the order.
 """
-    
-    encoded_message = urllib.parse.quote(message)
+
+def format_contact_message(message):
+    """Build the notification text for a new contact message"""
+    return f"""✉️ *NEW CONTACT MESSAGE*
+
+👤 From: {message.name}
+📧 Email: {message.email}
+📌 Subject: {message.subject}
+
+{message.message}
+"""
+
+def send_whatsapp_notification(order):
+    """Generate WhatsApp message for new order"""
+    encoded_message = urllib.parse.quote(format_order_message(order))
     whatsapp_url = f"https://wa.me/{WHATSAPP_NUMBER}?text={encoded_message}"
     return whatsapp_url
 
+# Notification outbox
+NOTIFICATION_SENDERS = build_senders(app.config)
+
+def enqueue_notification(event, subject, text):
+    """Add one outbox row per configured channel to the current transaction"""
+    site_settings = get_site_context()['site_settings']
+    if not NOTIFICATION_SENDERS or not (site_settings and site_settings.whatsapp_notifications):
+        return
+    payload = json.dumps({'event': event, 'subject': subject, 'text': text})
+    for channel in NOTIFICATION_SENDERS:
+        db.session.add(NotificationOutbox(event=event, channel=channel, payload=payload))
+
+def _claim_outbox_batch(now):
+    """Lease due rows so concurrent drainers in other workers skip them"""
+    table = NotificationOutbox.__table__
+    due = db.session.query(NotificationOutbox.id, NotificationOutbox.attempts).filter(
+        NotificationOutbox.status == 'pending',
+        NotificationOutbox.next_attempt_at <= now
+    ).order_by(NotificationOutbox.next_attempt_at).limit(app.config['OUTBOX_BATCH_SIZE']).all()
+
+    lease_until = now + timedelta(seconds=app.config['OUTBOX_LEASE_SECONDS'])
+    claimed = []
+    for row_id, attempts in due:
+        result = db.session.execute(
+            table.update()
+            .where(table.c.id == row_id, table.c.attempts == attempts, table.c.status == 'pending')
+            .values(attempts=attempts + 1, next_attempt_at=lease_until)
+        )
+        if result.rowcount:
+            claimed.append(row_id)
+    db.session.commit()
+    return claimed
+
+def drain_outbox(senders=None):
+    """Deliver one batch of due outbox rows and return how many were attempted"""
+    senders = NOTIFICATION_SENDERS if senders is None else senders
+    claimed = _claim_outbox_batch(datetime.utcnow())
+    for entry in NotificationOutbox.query.filter(NotificationOutbox.id.in_(claimed)).all():
+        sender = senders.get(entry.channel)
+        try:
+            if sender is None:
+                raise NotificationError(f'No sender configured for channel {entry.channel!r}')
+            sender.send(json.loads(entry.payload))
+        except Exception as e:
+            # Any failure counts as an attempt; letting it escape would strand the rest of the leased batch
+            if not isinstance(e, NotificationError):
+                app.logger.exception('Notification %s failed unexpectedly', entry.id)
+            entry.last_error = str(e) or type(e).__name__
+            if entry.attempts >= app.config['OUTBOX_MAX_ATTEMPTS']:
+                entry.status = 'dead'
+                app.logger.error('Notification %s dead-lettered after %s attempts: %s', entry.id, entry.attempts, e)
+            else:
+                entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_delay(entry.attempts))
+        else:
+            entry.status = 'sent'
+            entry.sent_at = datetime.utcnow()
+            entry.last_error = None
+        db.session.commit()
+    return len(claimed)
+
+_outbox_worker = None
+_outbox_worker_lock = threading.Lock()
+
+def _drain_outbox_in_context():
+    with app.app_context():
+        return drain_outbox()
+
+def start_outbox_worker():
+    """Start this process's outbox worker thread once, if senders are configured"""
+    global _outbox_worker
+    with _outbox_worker_lock:
+        if _outbox_worker is None and NOTIFICATION_SENDERS and app.config['NOTIFICATION_WORKER'] == 'thread':
+            _outbox_worker = OutboxWorker(_drain_outbox_in_context)
+            _outbox_worker.start()
+
+# Group commit writer
+_group_writer = None
+_group_writer_lock = threading.Lock()
+
+def _commit_write_batch(calls):
+    """Run each queued job in its own savepoint and commit the whole batch once"""
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            # pysqlite doesn't BEGIN before a SAVEPOINT, so releasing the first one would commit it
+            db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+        outcomes = []
+        for job, args in calls:
+            try:
+                with db.session.begin_nested():
+                    outcomes.append((True, job(*args)))
+            except Exception as e:
+                outcomes.append((False, e))
+        db.session.commit()
+        return outcomes
+
+def start_group_writer():
+    """Start this process's group-commit writer thread once, if enabled"""
+    global _group_writer
+    with _group_writer_lock:
+        if _group_writer is None and app.config['GROUP_COMMIT']:
+            _group_writer = GroupCommitWriter(_commit_write_batch, max_batch=app.config['GROUP_COMMIT_MAX_BATCH'],
+                                              max_wait=app.config['GROUP_COMMIT_MAX_WAIT_MS'] / 1000)
+            _group_writer.start()
+
+def run_write(job, *args):
+    """Run `job(*args)` in a committed transaction and return its result
+
+    With GROUP_COMMIT the job runs on the writer thread and shares a commit
+    with other requests, so it must return plain data rather than ORM objects.
+    """
+    if _group_writer is None:
+        result = job(*args)
+        db.session.commit()
+        return result
+    return _group_writer.submit(job, *args).result(timeout=app.config['GROUP_COMMIT_TIMEOUT'])
+
+@app.before_request
+def _lazy_startup():
+    if not _initialized:
+        ensure_initialized()
+    if _outbox_worker is None:
+        start_outbox_worker()
+    if _group_writer is None:
+        start_group_writer()
+
+@app.cli.command('drain-outbox')
+@click.option('--loop', is_flag=True, help='Keep draining until interrupted.')
+@click.option('--requeue-dead', is_flag=True, help='Move dead-lettered notifications back to pending first.')
+def drain_outbox_command(loop, requeue_dead):
+    """Deliver pending notifications from the outbox."""
+    ensure_initialized()
+    if requeue_dead:
+        count = NotificationOutbox.query.filter_by(status='dead').update(
+            {'status': 'pending', 'attempts': 0, 'next_attempt_at': datetime.utcnow()})
+        db.session.commit()
+        click.echo(f'Requeued {count} dead notifications.')
+    if loop:
+        worker = OutboxWorker(_drain_outbox_in_context)
+        worker.run()
+        return
+    total = 0
+    while True:
+        processed = drain_outbox()
+        if not processed:
+            break
+        total += processed
+    click.echo(f'Processed {total} notifications.')
+
+# Order stats helpers
+def _add_to_counters(table, key, count, revenue_cents):
+    """Add to the order_count/revenue_cents of the row matching `key`, creating it if missing
+
+    Two first writers for the same key must not fail each other's transaction,
+    so this is a single upsert where the dialect has one.
+    """
+    values = dict(key, order_count=count, revenue_cents=revenue_cents)
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        statement = (postgresql_insert if dialect == 'postgresql' else sqlite_insert)(table).values(**values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={'order_count': table.c.order_count + statement.excluded.order_count,
+                  'revenue_cents': table.c.revenue_cents + statement.excluded.revenue_cents}
+        ))
+        return
+
+    update = (
+        table.update()
+        .where(*(table.c[column] == value for column, value in key.items()))
+        .values(order_count=table.c.order_count + count, revenue_cents=table.c.revenue_cents + revenue_cents)
+    )
+    if db.session.execute(update).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**values))
+    except IntegrityError:
+        # Another transaction created the row after our UPDATE
+        db.session.execute(update)
+
+def bump_order_stats(status, count, revenue_cents):
+    """Adjust the counters for one status inside the caller's transaction"""
+    _add_to_counters(OrderStats.__table__, {'status': status}, count, revenue_cents)
+
+ROLLUP_PERIODS = ('day', 'week', 'month')
+
+def bucket_start(period, moment):
+    """Return the first day of the day/week/month bucket containing `moment`"""
+    day = moment.date()
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+def _bump_rollup(period, bucket, product_type, product_name, status, count, revenue_cents):
+    key = {'period': period, 'bucket_start': bucket, 'product_type': product_type,
+           'product_name': product_name, 'status': status}
+    _add_to_counters(OrderRollup.__table__, key, count, revenue_cents)
+
+def _aggregate_orders(rows, status=None):
+    """Group order rows into ({status: [count, cents]}, {rollup key: [count, cents]})"""
+    per_status = {}
+    per_bucket = {}
+    for row in rows:
+        row_status = status or row.status
+        totals = per_status.setdefault(row_status, [0, 0])
+        totals[0] += 1
+        totals[1] += row.price_cents
+        for period in ROLLUP_PERIODS:
+            key = (period, bucket_start(period, row.created_at), row.product_type, row.product_name, row_status)
+            totals = per_bucket.setdefault(key, [0, 0])
+            totals[0] += 1
+            totals[1] += row.price_cents
+    return per_status, per_bucket
+
+def record_orders(rows, sign, status=None):
+    """Add (sign=1) or remove (sign=-1) orders from the stats counters and analytics rollups
+
+    `rows` need status, price_cents, created_at, product_type and product_name;
+    `status` overrides the rows' own status, e.g. the status they are moving to.
+    """
+    per_status, per_bucket = _aggregate_orders(rows, status)
+    for row_status, (count, revenue_cents) in per_status.items():
+        bump_order_stats(row_status, sign * count, sign * revenue_cents)
+    for key, (count, revenue_cents) in per_bucket.items():
+        _bump_rollup(*key, sign * count, sign * revenue_cents)
+
+def rebuild_order_rollups():
+    """Replace the rollup table with buckets recomputed from the live and archived orders"""
+    # Archived orders still count towards history; orders archived to files do not
+    per_bucket = {}
+    for model in (Order, ArchivedOrder):
+        statement = db.select(model.status, model.price_cents, model.created_at, model.product_type,
+                              model.product_name).execution_options(yield_per=app.config['EXPORT_BATCH_SIZE'])
+        for partition in db.session.execute(statement).partitions():
+            for key, (count, revenue_cents) in _aggregate_orders(partition)[1].items():
+                totals = per_bucket.setdefault(key, [0, 0])
+                totals[0] += count
+                totals[1] += revenue_cents
+
+    OrderRollup.query.delete()
+    for (period, bucket, product_type, product_name, status), (count, revenue_cents) in per_bucket.items():
+        db.session.add(OrderRollup(period=period, bucket_start=bucket, product_type=product_type,
+                                   product_name=product_name, status=status,
+                                   order_count=count, revenue_cents=revenue_cents))
+    db.session.commit()
+    return len(per_bucket)
+
+@app.cli.command('rebuild-order-rollups')
+def rebuild_order_rollups_command():
+    """Recompute the analytics rollups from the orders table."""
+    ensure_initialized()
+    click.echo(f'Rebuilt {rebuild_order_rollups()} rollup buckets.')
+
+def compute_order_totals():
+    """Aggregate order count and revenue (cents) per status from the orders table in one pass"""
+    rows = db.session.query(
+        Order.status, db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.price_cents), 0)
+    ).group_by(Order.status).all()
+    return {status: (count, revenue) for status, count, revenue in rows}
+
+def order_totals():
+    """Return {status: (count, revenue_cents)} from the counters table or a grouped aggregate"""
+    if app.config['ORDER_STATS_COUNTERS']:
+        rows = db.session.query(OrderStats.status, OrderStats.order_count, OrderStats.revenue_cents).all()
+        return {status: (count, revenue) for status, count, revenue in rows}
+    return compute_order_totals()
+
+def rebuild_order_stats():
+    """Replace the counters table with totals recomputed from the orders table"""
+    totals = compute_order_totals()
+    OrderStats.query.delete()
+    for status, (count, revenue_cents) in totals.items():
+        db.session.add(OrderStats(status=status, order_count=count, revenue_cents=revenue_cents))
+    db.session.commit()
+    return totals
+
+@app.cli.command('rebuild-order-stats')
+@click.option('--verify', is_flag=True, help='Only compare the counters with a fresh aggregate.')
+def rebuild_order_stats_command(verify):
+    """Recompute the OrderStats counters from scratch."""
+    ensure_initialized()
+    if not verify:
+        totals = rebuild_order_stats()
+        click.echo(f'Rebuilt order stats for {len(totals)} statuses.')
+        return
+
+    expected = compute_order_totals()
+    stored = {row.status: (row.order_count, row.revenue_cents) for row in OrderStats.query.all()}
+    mismatches = 0
+    for status in sorted(set(expected) | set(stored), key=str):
+        want = expected.get(status, (0, 0))
+        have = stored.get(status, (0, 0))
+        if want != have:
+            mismatches += 1
+            click.echo(f'{status}: counters {have}, actual {want}')
+    if mismatches:
+        raise click.ClickException(f'{mismatches} status counters out of date.')
+    click.echo('Order stats are up to date.')
+
+# Full-text search
+# On SQLite with FTS5, orders and messages are mirrored into the search tables
+# from search.py. Mapper events keep them current for ORM writes; bulk
+# query.update()/delete() skips those events, so bulk paths must call
+# unindex_search_rows() themselves. Other databases use LIKE instead.
+_search_enabled = None
+
+def search_enabled():
+    """True when the FTS5 search tables exist"""
+    global _search_enabled
+    if _search_enabled is None:
+        _search_enabled = (db.engine.dialect.name == 'sqlite'
+                           and db.inspect(db.engine).has_table(SEARCH_INDEXES['order']['table']))
+    return _search_enabled
+
+def _search_document(spec, target):
+    return {'id': target.id, **{column: getattr(target, column) for column in spec['columns']}}
+
+@db.event.listens_for(Order, 'after_insert')
+@db.event.listens_for(ContactMessage, 'after_insert')
+def _index_inserted_row(mapper, connection, target):
+    if search_enabled():
+        spec = SEARCH_INDEXES[mapper.local_table.name]
+        index_rows(connection, spec, [_search_document(spec, target)])
+
+@db.event.listens_for(Order, 'after_update')
+@db.event.listens_for(ContactMessage, 'after_update')
+def _index_updated_row(mapper, connection, target):
+    if not search_enabled():
+        return
+    spec = SEARCH_INDEXES[mapper.local_table.name]
+    state = db.inspect(target)
+    # Status changes and read flags are the common updates; they don't touch the index
+    if any(state.attrs[column].history.has_changes() for column in spec['columns']):
+        index_rows(connection, spec, [_search_document(spec, target)])
+
+@db.event.listens_for(Order, 'after_delete')
+@db.event.listens_for(ContactMessage, 'after_delete')
+def _unindex_deleted_row(mapper, connection, target):
+    if search_enabled():
+        delete_rows(connection, SEARCH_INDEXES[mapper.local_table.name], [target.id])
+
+def unindex_search_rows(model, ids):
+    """Drop rows removed by a bulk delete from the search index, in the caller's transaction"""
+    if search_enabled():
+        delete_rows(db.session.connection(), SEARCH_INDEXES[model.__tablename__], list(ids))
+
+def search_rows(model, columns, terms, limit, offset=0):
+    """Return up to `limit` rows of `columns` matching every term as a prefix, best first"""
+    spec = SEARCH_INDEXES[model.__tablename__]
+    if search_enabled():
+        ids = search_ids(db.session.connection(), spec, terms, limit, offset)
+        rows = db.session.query(*columns).filter(model.id.in_(ids)).all()
+        rank = {row_id: position for position, row_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: rank[row.id])
+
+    query = db.session.query(*columns)
+    for term in terms:
+        query = query.filter(db.or_(*(
+            db.func.lower(getattr(model, column)).contains(term.lower(), autoescape=True)
+            for column in spec['columns']
+        )))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit).offset(offset).all()
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Recreate the full-text search tables from the orders and messages tables."""
+    ensure_initialized()
+    if not search_enabled():
+        raise click.ClickException('Full-text search needs SQLite with FTS5; LIKE search is in use.')
+    with db.engine.begin() as connection:
+        for spec in SEARCH_INDEXES.values():
+            create_index(connection, spec)
+    click.echo('Search index rebuilt.')
+
+# Uploaded media processing
+_media_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='media')
+
+def run_media_job(f, *args):
+    """Run a media processing job in the background worker (or inline when configured)"""
+    if app.config['MEDIA_PROCESSING'] == 'inline':
+        return f(*args)
+    return _media_executor.submit(f, *args)
+
+def process_logo_upload(logo_path):
+    """Generate the logo variants and publish them on the settings row"""
+    with app.app_context():
+        try:
+            variants = process_logo(os.path.join('static', logo_path), os.path.join('static', os.path.dirname(logo_path)))
+        except ImageProcessingError as e:
+            app.logger.warning('Serving the original logo: %s', e)
+            return
+        directory = os.path.dirname(logo_path)
+        images = {group: {label: os.path.join(directory, name) for label, name in names.items()}
+                  for group, names in variants.items()}
+
+        settings = SiteSettings.query.first()
+        if settings is None or settings.logo_path != logo_path:
+            return  # A newer upload replaced this logo while it was processing
+        settings.logo_variants = json.dumps(images)
+        settings.updated_at = datetime.utcnow()
+        db.session.commit()
+
+@app.cli.command('process-logo')
+def process_logo_command():
+    """Regenerate the variants of the current logo."""
+    ensure_initialized()
+    settings = SiteSettings.query.first()
+    if not settings or not settings.logo_path:
+        raise click.ClickException('No logo uploaded.')
+    process_logo_upload(settings.logo_path)
+    click.echo('Logo variants updated.' if SiteSettings.query.first().logo_variants else 'Logo could not be processed.')
+
+def process_music_upload(music_path):
+    """Transcode the uploaded music and publish the stream on the settings row"""
+    with app.app_context():
+        try:
+            filename = transcode_music(build_transcoder(app.config), os.path.join('static', music_path),
+                                       os.path.join('static', os.path.dirname(music_path)))
+        except (TranscodeError, OSError) as e:
+            app.logger.warning('Serving the original music upload: %s', e)
+            return
+
+        settings = SiteSettings.query.first()
+        if settings is None or settings.background_music_path != music_path:
+            return  # A newer upload replaced this file while it was transcoding
+        settings.music_stream_path = filename
+        settings.updated_at = datetime.utcnow()
+        db.session.commit()
+
+@app.cli.command('process-music')
+def process_music_command():
+    """Re-transcode the current background music."""
+    ensure_initialized()
+    settings = SiteSettings.query.first()
+    if not settings or not settings.background_music_path:
+        raise click.ClickException('No background music uploaded.')
+    process_music_upload(settings.background_music_path)
+    click.echo('Music stream updated.' if SiteSettings.query.first().music_stream_path else 'Music could not be transcoded.')
+
+# Static assets
+# CSS/JS are served from static/dist under content-hashed names (see assets.py).
+# url_for('static') is rewritten to those names, and the static view serves them
+# as immutable, with the precompressed sibling the client accepts.
+_asset_manifest = {}
+_built_assets = {}
+
+def init_assets(rebuild=False):
+    """Load the asset manifest, building static/dist first when missing, stale or `rebuild` is set"""
+    global _asset_manifest, _built_assets
+    manifest = {}
+    if app.config['STATIC_ASSETS'] != 'off':
+        manifest = None if rebuild else load_manifest(app.static_folder)
+        if manifest is None:
+            manifest = build_assets(app.static_folder)
+    _built_assets = {built: available_encodings(app.static_folder, built) for built in manifest.values()}
+    _asset_manifest = manifest
+    return manifest
+
+@app.url_defaults
+def hashed_static_url(endpoint, values):
+    if endpoint == 'static' and _asset_manifest:
+        built = _asset_manifest.get(values.get('filename'))
+        if built:
+            values['filename'] = built
+
+# Logo variants written by process_logo() carry a content hash, so they never change
+_HASHED_LOGO_NAME = re.compile(r'^uploads/logos/[^/]+\.[0-9a-f]{12}\.\w+$')
+
+def static_file(filename):
+    """Serve a static file; built assets are immutable and sent precompressed when accepted"""
+    if filename not in _built_assets:
+        response = app.send_static_file(filename)
+        if _HASHED_LOGO_NAME.match(filename):
+            response.headers['Cache-Control'] = f"public, max-age={app.config['STATIC_ASSET_MAX_AGE']}, immutable"
+        return response
+    encoding, suffix = next(((e, s) for e, s in _built_assets[filename] if request.accept_encodings[e]), (None, ''))
+    max_age = app.config['STATIC_ASSET_MAX_AGE']
+    response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetypes.guess_type(filename)[0],
+                                   conditional=True, max_age=max_age)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    return response
+
+app.view_functions['static'] = static_file
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify and fingerprint CSS/JS into static/dist."""
+    for source, built in sorted(init_assets(rebuild=True).items()):
+        click.echo(f'{source} -> {built}')
+
 # Login required decorator
 def login_required(f):
     @wraps(f)
@@ -130,456 +1067,291 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Rate limiting
+def _build_rate_limiter():
+    backend = app.config['RATE_LIMIT_BACKEND']
+    if backend == 'off':
+        return None
+    if backend == 'file':
+        return RateLimiter(FileBackend(app.config['RATE_LIMIT_FILE']), app.config['RATE_LIMITS'])
+    return RateLimiter(MemoryBackend(), app.config['RATE_LIMITS'])
+
+rate_limiter = _build_rate_limiter()
+
+def rate_limited(f):
+    """Answer POSTs over the route's limit with 429 and Retry-After"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method == 'POST' and rate_limiter is not None:
+            retry_after = rate_limiter.hit(f.__name__, request.remote_addr)
+            if retry_after:
+                raise TooManyRequests('Too many requests. Please wait a moment and try again.',
+                                      retry_after=math.ceil(retry_after))
+        return f(*args, **kwargs)
+    return decorated_function
+
 # Products data
-WHATSAPP_BOTS = [
-    {
-        'id': 'basic',
-        'name': 'Basic Bot',
-        'price': 15,
-        'features': [
-            'Auto-reply messages',
-            'Basic commands',
-            'Message scheduling',
-            'Up to 100 contacts',
-            '24/7 Support'
-        ]
-    },
-    {
-        'id': 'advanced',
-        'name': 'Advanced Bot',
-        'price': 30,
-        'features': [
-            'All Basic features',
-            'Custom commands',
-            'Media support (images, videos)',
-            'Up to 500 contacts',
-            'Analytics dashboard',
-            'Priority support'
-        ],
-        'popular': True
-    },
-    {
-        'id': 'premium',
-        'name': 'Premium Bot',
-        'price': 45,
-        'features': [
-            'All Advanced features',
-            'AI-powered responses',
-            'Unlimited contacts',
-            'API integration',
-            'Multi-device support',
-            'Custom branding',
-            'Dedicated support'
-        ]
-    }
-]
-
-DOMAINS = [
-    {
-        'id': 'com',
-        'name': '.com',
-        'price': 30,
-        'features': [
-            '1 year registration',
-            'Free DNS management',
-            'Free email forwarding',
-            'Privacy protection',
-            'Easy domain management'
-        ],
-        'popular': True
-    },
-    {
-        'id': 'net',
-        'name': '.net',
-        'price': 30,
-        'features': [
-            '1 year registration',
-            'Free DNS management',
-            'Free email forwarding',
-            'Privacy protection',
-            'Easy domain management'
-        ]
-    },
-    {
-        'id': 'zw',
-        'name': '.zw',
-        'price': 30,
-        'features': [
-            '1 year registration',
-            'Free DNS management',
-            'Free email forwarding',
-            'Privacy protection',
-            'Easy domain management'
-        ]
-    },
-    {
-        'id': 'id',
-        'name': '.id',
-        'price': 30,
-        'features': [
-            '1 year registration',
-            'Free DNS management',
-            'Free email forwarding',
-            'Privacy protection',
-            'Easy domain management'
-        ]
-    },
-    {
-        'id': 'business',
-        'name': '.business',
-        'price': 30,
-        'features': [
-            '1 year registration',
-            'Free DNS management',
-            'Free email forwarding',
-            'Privacy protection',
-            'Easy domain management'
-        ]
-    },
-    {
-        'id': 'zone-id',
-        'name': '.zone.id',
-        'price': 25,
-        'features': [
-            '1 year registration',
-            'Free DNS management',
-            'Free email forwarding',
-            'Privacy protection',
-            'Easy domain management'
-        ]
-    }
-]
-
-WEBSITES = [
-    {
-        'id': 'landing',
-        'name': 'Landing Page',
-        'price': 150,
-        'features': [
-            'Single page design',
-            'Responsive layout',
-            'Contact form integration',
-            'SEO optimization',
-            'Fast loading speed',
-            '1 month free support'
-        ]
-    },
-    {
-        'id': 'business',
-        'name': 'Business Website',
-        'price': 350,
-        'features': [
-            'Up to 5 pages',
-            'Custom design',
-            'Mobile responsive',
-            'Contact forms',
-            'SEO optimization',
-            'Social media integration',
-            'Google Analytics',
-            '3 months free support'
-        ],
-        'popular': True
-    },
-    {
-        'id': 'ecommerce',
-        'name': 'E-Commerce Website',
-        'price': 650,
-        'features': [
-            'Full e-commerce functionality',
-            'Product management system',
-            'Shopping cart',
-            'Payment gateway integration',
-            'Order management',
-            'Customer accounts',
-            'Inventory tracking',
-            'Mobile responsive',
-            'SEO optimization',
-            '6 months free support'
-        ]
-    },
-    {
-        'id': 'custom',
-        'name': 'Custom Website',
-        'price': 1000,
-        'features': [
-            'Unlimited pages',
-            'Custom functionality',
-            'Database integration',
-            'Admin dashboard',
-            'API development',
-            'Advanced features',
-            'Complete customization',
-            'Mobile responsive',
-            'SEO optimization',
-            '1 year free support'
-        ]
-    }
-]
-
-HOSTING = [
-    {
-        'id': 'monthly',
-        'name': 'Monthly Hosting',
-        'price': 5,
-        'period': '/month',
-        'features': [
-            '10 GB SSD Storage',
-            'Unlimited Bandwidth',
-            '1 Website',
-            'Free SSL Certificate',
-            'Daily Backups',
-            'Email Accounts',
-            '99.9% Uptime Guarantee',
-            '24/7 Support'
-        ]
-    },
-    {
-        'id': 'quarterly',
-        'name': '3-Month Hosting',
-        'price': 15,
-        'period': '/3 months',
-        'features': [
-            '20 GB SSD Storage',
-            'Unlimited Bandwidth',
-            '3 Websites',
-            'Free SSL Certificate',
-            'Daily Backups',
-            'Unlimited Email Accounts',
-            '99.9% Uptime Guarantee',
-            'Priority Support',
-            'Save 10%'
-        ],
-        'popular': True
-    },
-    {
-        'id': 'biannual',
-        'name': '6-Month Hosting',
-        'price': 25,
-        'period': '/6 months',
-        'features': [
-            '50 GB SSD Storage',
-            'Unlimited Bandwidth',
-            'Unlimited Websites',
-            'Free SSL Certificate',
-            'Daily Backups',
-            'Unlimited Email Accounts',
-            'Free Domain (.com)',
-            '99.9% Uptime Guarantee',
-            'Priority Support',
-            'Save 20%'
-        ]
-    },
-    {
-        'id': 'annual',
-        'name': 'Annual Hosting',
-        'price': 45,
-        'period': '/year',
-        'features': [
-            '100 GB SSD Storage',
-            'Unlimited Bandwidth',
-            'Unlimited Websites',
-            'Free SSL Certificate',
-            'Daily Backups',
-            'Unlimited Email Accounts',
-            'Free Domain (.com)',
-            'Free Website Migration',
-            '99.9% Uptime Guarantee',
-            'Dedicated Support',
-            'Save 30%'
-        ]
-    }
-]
-
-PREMIUM_APPS = [
-    {
-        'id': 'netflix',
-        'name': 'Netflix Premium Mod',
-        'price': 10,
-        'icon': 'fab fa-netflix',
-        'color': '#E50914',
-        'features': [
-            'Unlimited streaming',
-            '4K Ultra HD quality',
-            'Download content offline',
-            'No ads',
-            'Multiple profiles',
-            'Modded by Ntando Mods',
-            'Lifetime updates',
-            'Installation support'
-        ],
-        'popular': True
-    },
-    {
-        'id': 'spotify',
-        'name': 'Spotify Premium Mod',
-        'price': 10,
-        'icon': 'fab fa-spotify',
-        'color': '#1DB954',
-        'features': [
-            'Unlimited skips',
-            'No ads',
-            'Offline mode',
-            'High quality audio',
-            'Access to all songs',
-            'Modded by Ntando Mods',
-            'Lifetime updates',
-            'Installation support'
-        ]
-    },
-    {
-        'id': 'photoshop',
-        'name': 'Adobe Photoshop Mod',
-        'price': 10,
-        'icon': 'fas fa-image',
-        'color': '#31A8FF',
-        'features': [
-            'Full version unlocked',
-            'All premium features',
-            'Professional photo editing',
-            'Advanced filters',
-            'Cloud integration',
-            'Modded by Ntando Mods',
-            'Lifetime updates',
-            'Installation guide'
-        ]
-    },
-    {
-        'id': 'youtube-premium',
-        'name': 'YouTube Premium Mod',
-        'price': 10,
-        'icon': 'fab fa-youtube',
-        'color': '#FF0000',
-        'features': [
-            'Ad-free videos',
-            'Background playback',
-            'Download videos',
-            'YouTube Music Premium',
-            'Picture-in-picture',
-            'Modded by Ntando Mods',
-            'Lifetime updates',
-            'Installation support'
-        ]
-    },
-    {
-        'id': 'canva-pro',
-        'name': 'Canva Pro Mod',
-        'price': 10,
-        'icon': 'fas fa-palette',
-        'color': '#00C4CC',
-        'features': [
-            'Premium templates',
-            'Brand kit access',
-            'Background remover',
-            'Unlimited storage',
-            'Team collaboration',
-            'Modded by Ntando Mods',
-            'Lifetime updates',
-            'Installation support'
-        ]
-    },
-    {
-        'id': 'microsoft-office',
-        'name': 'Microsoft Office 365 Mod',
-        'price': 10,
-        'icon': 'fab fa-microsoft',
-        'color': '#D83B01',
-        'features': [
-            'Word, Excel, PowerPoint',
-            'OneDrive storage',
-            'Outlook email',
-            'Teams access',
-            'All premium features',
-            'Modded by Ntando Mods',
-            'Lifetime updates',
-            'Installation guide'
-        ]
-    }
-]
+CATALOG = Catalog.from_file(app.config['CATALOG_FILE'])
+
+# Site settings cache
+# The settings row and active custom features are snapshotted into plain objects
+# and shared by every render in this process. Each snapshot is tagged with a
+# generation stamp taken from SiteSettings.updated_at; CustomFeature writes bump
+# that column too, so other workers notice a change by comparing stamps.
+_settings_cache = {'generation': None, 'context': None, 'checked_at': 0.0}
+_settings_cache_lock = threading.Lock()
+
+def _snapshot(row):
+    """Copy the column values of a model instance into a detached object"""
+    return SimpleNamespace(**{c.name: getattr(row, c.name) for c in row.__table__.columns})
+
+def _read_settings_generation():
+    updated_at = db.session.query(SiteSettings.updated_at).order_by(SiteSettings.id).limit(1).scalar()
+    return updated_at.isoformat() if updated_at else ''
+
+def _load_site_context():
+    settings = SiteSettings.query.first()
+    custom_features = CustomFeature.query.filter_by(active=True).order_by(CustomFeature.order_position).all()
+    generation = settings.updated_at.isoformat() if settings and settings.updated_at else ''
+    context = dict(
+        site_settings=_snapshot(settings) if settings else None,
+        custom_features=tuple(_snapshot(feature) for feature in custom_features)
+    )
+    if settings:
+        context['site_settings'].logo_images = json.loads(settings.logo_variants) if settings.logo_variants else None
+    return generation, context
+
+def invalidate_site_settings_cache():
+    """Drop this worker's cached settings so the next render reloads them"""
+    with _settings_cache_lock:
+        _settings_cache['context'] = None
+        _settings_cache['checked_at'] = 0.0
+
+def get_site_context():
+    """Return the cached settings context, reloading it when the generation changes"""
+    now = time.monotonic()
+    interval = app.config['SETTINGS_CACHE_CHECK_INTERVAL']
+    cache = _settings_cache
+    # Read each field once: invalidate_site_settings_cache() may clear them between reads
+    context, checked_at = cache['context'], cache['checked_at']
+    if context is not None and now - checked_at < interval:
+        return context
+
+    with _settings_cache_lock:
+        if cache['context'] is not None and now - cache['checked_at'] < interval:
+            return cache['context']
+        if cache['context'] is not None and _read_settings_generation() == cache['generation']:
+            cache['checked_at'] = now
+            return cache['context']
+        cache['generation'], cache['context'] = _load_site_context()
+        cache['checked_at'] = now
+        return cache['context']
+
+def settings_generation():
+    """Return the generation stamp of the cached settings context"""
+    get_site_context()
+    return _settings_cache['generation']
+
+def _touch_site_settings(connection):
+    connection.execute(SiteSettings.__table__.update().values(updated_at=datetime.utcnow()))
+
+@db.event.listens_for(CustomFeature, 'after_insert')
+@db.event.listens_for(CustomFeature, 'after_update')
+@db.event.listens_for(CustomFeature, 'after_delete')
+def _custom_feature_changed(mapper, connection, target):
+    # Bump the shared stamp inside the same transaction as the feature change
+    _touch_site_settings(connection)
+    db.session.info['site_settings_dirty'] = True
+
+@db.event.listens_for(SiteSettings, 'after_update')
+def _site_settings_changed(mapper, connection, target):
+    db.session.info['site_settings_dirty'] = True
+
+@db.event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('site_settings_dirty', False):
+        invalidate_site_settings_cache()
+
+@db.event.listens_for(db.session, 'after_rollback')
+def _discard_dirty_flag(session):
+    session.info.pop('site_settings_dirty', None)
 
 # Context processor to inject site settings and custom features
 @app.context_processor
 def inject_site_settings():
-    settings = SiteSettings.query.first()
-    custom_features = CustomFeature.query.filter_by(active=True).order_by(CustomFeature.order_position).all()
-    return dict(site_settings=settings, custom_features=custom_features)
+    with timed('settings'):
+        return get_site_context()
+
+# Full-page cache for public pages
+# Entries are keyed by path, settings generation and whether the admin nav link
+# is shown, so a settings change simply stops matching the old entries.
+_page_cache = LRUCache(app.config['PAGE_CACHE_SIZE'])
+
+def cached_page(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Flashed messages are rendered once and popped, so never cache them
+        if request.method != 'GET' or session.get('_flashes'):
+            return f(*args, **kwargs)
+
+        key = (request.path, settings_generation(), 'admin_id' in session)
+        entry = _page_cache.get(key)
+        if entry is None:
+            rv = f(*args, **kwargs)
+            if not isinstance(rv, str):
+                return rv
+            body = rv.encode('utf-8')
+            entry = (body, hashlib.sha256(body).hexdigest()[:32])
+            _page_cache.set(key, entry)
+
+        body, etag = entry
+        response = make_response(body)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    return decorated_function
+
+# Fragment cache for the layout chrome (nav, footer) shared by every page
+# Like the page cache, entries carry the settings generation, so a settings
+# change renders the fragments afresh.
+app.jinja_env.add_extension(FragmentCacheExtension)
+if app.config['FRAGMENT_CACHE_SIZE'] > 0:
+    app.jinja_env.fragment_cache = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
+app.jinja_env.fragment_cache_generation = settings_generation
 
 # Routes
 @app.route('/')
+@cached_page
 def index():
     return render_template('index.html')
 
 @app.route('/whatsapp-bots')
+@cached_page
 def whatsapp_bots():
-    return render_template('whatsapp-bots.html', bots=WHATSAPP_BOTS)
+    return render_template('whatsapp-bots.html', bots=CATALOG.category('bot'))
 
 @app.route('/domains')
+@cached_page
 def domains():
-    return render_template('domains.html', domains=DOMAINS)
+    return render_template('domains.html', domains=CATALOG.category('domain'))
 
 @app.route('/websites')
+@cached_page
 def websites():
-    return render_template('websites.html', websites=WEBSITES)
+    return render_template('website.html', websites=CATALOG.category('website'))
 
 @app.route('/hosting')
+@cached_page
 def hosting():
-    return render_template('hosting.html', hosting_plans=HOSTING)
+    return render_template('hosting.html', hosting_plans=CATALOG.category('hosting'))
 
 @app.route('/premium-apps')
+@cached_page
 def premium_apps():
-    return render_template('premium_apps.html', apps=PREMIUM_APPS)
+    return render_template('premium_apps.html', apps=CATALOG.category('app'))
 
 @app.route('/about')
+@cached_page
 def about():
     return render_template('about.html')
 
+# Only transcoded files carry a content hash, so only they may be cached as immutable
+_HASHED_MUSIC_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+@app.route('/media/music/<path:filename>')
+def music_stream(filename):
+    """Serve transcoded background music with Range support and a long cache lifetime"""
+    if not _HASHED_MUSIC_NAME.search(filename):
+        abort(404)
+    max_age = app.config['MUSIC_CACHE_MAX_AGE']
+    response = send_from_directory(os.path.join(app.config['UPLOAD_FOLDER'], 'music'), filename,
+                                   conditional=True, max_age=max_age)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    return response
+
+# Public form writes, run through run_write() so they can be group committed
+def _insert_contact_message(fields):
+    message = ContactMessage(**fields)
+    db.session.add(message)
+    enqueue_notification('contact', f'New message: {message.subject}', format_contact_message(message))
+    db.session.flush()
+    return message.id
+
+def _insert_order(fields):
+    """Insert an order with its counters and notifications; return a detached snapshot"""
+    order = Order(**fields)
+    db.session.add(order)
+    db.session.flush()
+    record_orders([order], 1)
+    enqueue_notification('order', f'New order #{order.id}: {order.product_name}', format_order_message(order))
+    return _order_snapshot(order)
+
+def _order_snapshot(order):
+    snapshot = _snapshot(order)
+    snapshot.price = order.price
+    return snapshot
+
+def _order_for_key(idempotency_key):
+    order = Order.query.filter_by(idempotency_key=idempotency_key).first() if idempotency_key else None
+    return _order_snapshot(order) if order else None
+
 @app.route('/contact', methods=['GET', 'POST'])
+@rate_limited
 def contact():
     if request.method == 'POST':
-        message = ContactMessage(
-            name=request.form['name'],
-            email=request.form['email'],
-            subject=request.form['subject'],
-            message=request.form['message']
-        )
-        db.session.add(message)
-        db.session.commit()
+        run_write(_insert_contact_message, {
+            'name': request.form['name'],
+            'email': request.form['email'],
+            'subject': request.form['subject'],
+            'message': request.form['message']
+        })
         flash('Thank you for your message! We will get back to you soon.', 'success')
         return redirect(url_for('contact'))
     return render_template('contact.html')
 
 @app.route('/order/<product_type>/<product_id>')
 def order(product_type, product_id):
-    product = None
-    if product_type == 'bot':
-        product = next((bot for bot in WHATSAPP_BOTS if bot['id'] == product_id), None)
-    elif product_type == 'domain':
-        product = next((domain for domain in DOMAINS if domain['id'] == product_id), None)
-    elif product_type == 'website':
-        product = next((website for website in WEBSITES if website['id'] == product_id), None)
-    elif product_type == 'hosting':
-        product = next((host for host in HOSTING if host['id'] == product_id), None)
-    elif product_type == 'app':
-        product = next((app for app in PREMIUM_APPS if app['id'] == product_id), None)
+    product = CATALOG.get(product_type, product_id)
     
     if not product:
         flash('Product not found.', 'error')
         return redirect(url_for('index'))
     
-    return render_template('order.html', product=product, product_type=product_type)
+    return render_template('order.html', product=product, product_type=product_type,
+                           idempotency_key=uuid.uuid4().hex)
 
 @app.route('/submit-order', methods=['POST'])
+@rate_limited
 def submit_order():
-    order = Order(
-        customer_name=request.form['name'],
-        email=request.form['email'],
-        phone=request.form['phone'],
-        product_type=request.form['product_type'],
-        product_name=request.form['product_name'],
-        price=float(request.form['price']),
-        notes=request.form.get('notes', '')
-    )
-    db.session.add(order)
-    db.session.commit()
+    # Name and price always come from the catalog, never from the form
+    product = CATALOG.get(request.form.get('product_type'), request.form.get('product_id'))
+    if not product:
+        flash('Product not found.', 'error')
+        return redirect(url_for('index'))
+    
+    # A double tap or a refreshed success page posts the same key again; show the
+    # order it created instead of inserting (and notifying) a duplicate
+    idempotency_key = request.form.get('idempotency_key', '')[:64] or None
+    order = _order_for_key(idempotency_key)
+    if order is None:
+        try:
+            order = run_write(_insert_order, {
+                'customer_name': request.form['name'],
+                'email': request.form['email'],
+                'phone': request.form['phone'],
+                'product_type': product.type,
+                'product_name': product.name,
+                'price_cents': product.price_cents,
+                'status': 'pending',
+                'notes': request.form.get('notes', ''),
+                'idempotency_key': idempotency_key
+            })
+        except IntegrityError:
+            # A concurrent request with the same key committed first
+            db.session.rollback()
+            order = _order_for_key(idempotency_key)
+            if order is None:
+                raise
     
     # Generate WhatsApp notification URL
     whatsapp_url = send_whatsapp_notification(order)
@@ -589,6 +1361,7 @@ def submit_order():
 
 # Admin Routes
 @app.route('/admin/login', methods=['GET', 'POST'])
+@rate_limited
 def admin_login():
     if request.method == 'POST':
         username = request.form['username']
@@ -611,19 +1384,76 @@ def admin_logout():
     flash('You have been logged out.', 'info')
     return redirect(url_for('index'))
 
+# Columns shown in the admin order and message tables
+def _order_list_columns():
+    return (Order.id, Order.customer_name, Order.email, Order.phone, Order.product_type,
+            Order.product_name, Order.price_cents, Order.status, Order.created_at, Order.notes)
+
+def _message_list_columns():
+    # Tables only show a 50 character preview, so don't pull the whole body
+    return (ContactMessage.id, ContactMessage.name, ContactMessage.email, ContactMessage.subject,
+            db.func.substr(ContactMessage.message, 1, 51).label('message'),
+            ContactMessage.created_at, ContactMessage.read)
+
+# Keyset pagination helpers
+def _encode_cursor(row):
+    return f"{row.created_at.isoformat()}_{row.id}"
+
+def _decode_cursor(cursor):
+    try:
+        created_at, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+def _keyset_page(query, model, cursor=None, limit=None):
+    """Return one (created_at desc, id desc) page of rows and the cursor for the next one"""
+    limit = limit or app.config['ADMIN_PAGE_SIZE']
+    position = _decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, row_id = position
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < row_id)
+        ))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def _serialize_row(row):
+    data = row._asdict()
+    data['created_at'] = row.created_at.isoformat() if row.created_at else None
+    return data
+
+def _filtered_orders(status_filter):
+    query = db.session.query(*_order_list_columns())
+    if status_filter != 'all':
+        query = query.filter(Order.status == status_filter)
+    return query
+
+def _filtered_messages(read_filter):
+    query = db.session.query(*_message_list_columns())
+    if read_filter == 'unread':
+        query = query.filter(ContactMessage.read == False)
+    elif read_filter != 'all':
+        query = query.filter(ContactMessage.read == True)
+    return query
+
 @app.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).all()
+    limit = app.config['DASHBOARD_RECENT_LIMIT']
+    orders, _ = _keyset_page(_filtered_orders('all'), Order, limit=limit)
+    messages, _ = _keyset_page(_filtered_messages('all'), ContactMessage, limit=limit)
     
+    totals = order_totals()
     stats = {
-        'total_orders': Order.query.count(),
-        'pending_orders': Order.query.filter_by(status='pending').count(),
-        'completed_orders': Order.query.filter_by(status='completed').count(),
+        'total_orders': sum(count for count, _ in totals.values()),
+        'pending_orders': totals.get('pending', (0, 0))[0],
+        'completed_orders': totals.get('completed', (0, 0))[0],
         'unread_messages': ContactMessage.query.filter_by(read=False).count(),
-        'total_revenue': db.session.query(db.func.sum(Order.price)).filter_by(status='completed').scalar() or 0,
-        'pending_revenue': db.session.query(db.func.sum(Order.price)).filter_by(status='pending').scalar() or 0
+        'total_revenue': cents_to_decimal(totals.get('completed', (0, 0))[1]),
+        'pending_revenue': cents_to_decimal(totals.get('pending', (0, 0))[1])
     }
     
     return render_template('admin/dashboard.html', orders=orders, messages=messages, stats=stats)
@@ -632,13 +1462,15 @@ def admin_dashboard():
 @login_required
 def admin_orders():
     status_filter = request.args.get('status', 'all')
-    
-    if status_filter == 'all':
-        orders = Order.query.order_by(Order.created_at.desc()).all()
-    else:
-        orders = Order.query.filter_by(status=status_filter).order_by(Order.created_at.desc()).all()
-    
-    return render_template('admin/orders.html', orders=orders, status_filter=status_filter)
+    orders, next_cursor = _keyset_page(_filtered_orders(status_filter), Order, request.args.get('cursor'))
+    return render_template('admin/orders.html', orders=orders, status_filter=status_filter, next_cursor=next_cursor)
+
+@app.route('/admin/orders/more')
+@login_required
+def admin_orders_more():
+    status_filter = request.args.get('status', 'all')
+    orders, next_cursor = _keyset_page(_filtered_orders(status_filter), Order, request.args.get('cursor'))
+    return jsonify({'items': [_serialize_row(order) for order in orders], 'next_cursor': next_cursor})
 
 @app.route('/admin/order/<int:order_id>')
 @login_required
@@ -651,7 +1483,13 @@ def admin_order_detail(order_id):
 @login_required
 def update_order_status(order_id):
     order = Order.query.get_or_404(order_id)
-    order.status = request.form['status']
+    new_status = request.form['status']
+    if new_status not in ORDER_STATUSES:
+        return jsonify({'success': False, 'error': 'Invalid status'}), 400
+    if new_status != order.status:
+        record_orders([order], -1)
+        record_orders([order], 1, status=new_status)
+        order.status = new_status
     db.session.commit()
     return jsonify({'success': True})
 
@@ -660,22 +1498,472 @@ def update_order_status(order_id):
 def delete_order(order_id):
     order = Order.query.get_or_404(order_id)
     db.session.delete(order)
+    record_orders([order], -1)
     db.session.commit()
     return jsonify({'success': True})
 
+def _bulk_error(message):
+    return jsonify({'success': False, 'error': message}), 400
+
+def _parse_bulk_request():
+    """Return (payload, ids, error_response) for a bulk action JSON body"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return {}, None, _bulk_error('Expected a JSON object')
+    raw_ids = payload.get('ids', [])
+    # int() would accept "12" digit by digit from a string, and True or 1.5 as ids
+    if not isinstance(raw_ids, list) or not all(type(i) is int for i in raw_ids):
+        return payload, None, _bulk_error('ids must be a list of integers')
+    ids = sorted(set(raw_ids))
+    if not ids:
+        return payload, None, _bulk_error('No ids given')
+    if len(ids) > app.config['BULK_ACTION_LIMIT']:
+        return payload, None, _bulk_error('Too many ids')
+    return payload, ids, None
+
+def _bulk_results(ids, found, outcome):
+    return {str(i): (outcome if i in found else 'not_found') for i in ids}
+
+@app.route('/admin/orders/bulk', methods=['POST'])
+@login_required
+def bulk_orders():
+    payload, ids, error = _parse_bulk_request()
+    if error:
+        return error
+    action = payload.get('action')
+
+    rows = db.session.query(
+        Order.id, Order.status, Order.price_cents, Order.created_at, Order.product_type, Order.product_name
+    ).filter(Order.id.in_(ids)).all()
+    found = {row.id for row in rows}
+    query = Order.query.filter(Order.id.in_(found))
+
+    if action == 'update-status':
+        new_status = payload.get('status')
+        if new_status not in ORDER_STATUSES:
+            return _bulk_error('Invalid status')
+        changed = [row for row in rows if row.status != new_status]
+        query.update({'status': new_status}, synchronize_session=False)
+        record_orders(changed, -1)
+        record_orders(changed, 1, status=new_status)
+        outcome = 'updated'
+    elif action == 'delete':
+        query.delete(synchronize_session=False)
+        record_orders(rows, -1)
+        unindex_search_rows(Order, found)
+        outcome = 'deleted'
+    else:
+        return _bulk_error('Unknown action')
+
+    db.session.commit()
+    return jsonify({'success': True, 'results': _bulk_results(ids, found, outcome)})
+
+@app.route('/admin/messages/bulk', methods=['POST'])
+@login_required
+def bulk_messages():
+    payload, ids, error = _parse_bulk_request()
+    if error:
+        return error
+    action = payload.get('action')
+
+    found = {row.id for row in db.session.query(ContactMessage.id).filter(ContactMessage.id.in_(ids))}
+    query = ContactMessage.query.filter(ContactMessage.id.in_(found))
+
+    if action == 'mark-read':
+        query.update({'read': True}, synchronize_session=False)
+        outcome = 'updated'
+    elif action == 'delete':
+        query.delete(synchronize_session=False)
+        unindex_search_rows(ContactMessage, found)
+        outcome = 'deleted'
+    else:
+        return _bulk_error('Unknown action')
+
+    db.session.commit()
+    return jsonify({'success': True, 'results': _bulk_results(ids, found, outcome)})
+
+@app.route('/admin/search')
+@login_required
+def admin_search():
+    """Ranked search over orders or messages by name, email, phone and text"""
+    kind = request.args.get('type', 'orders')
+    if kind == 'orders':
+        model, columns = Order, _order_list_columns()
+    elif kind == 'messages':
+        model, columns = ContactMessage, _message_list_columns()
+    else:
+        return jsonify({'success': False, 'error': 'Unknown search type'}), 400
+
+    terms = search_terms(request.args.get('q'))
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = app.config['ADMIN_PAGE_SIZE']
+    rows = search_rows(model, columns, terms, limit + 1, (page - 1) * limit) if terms else []
+    return jsonify({
+        'items': [_serialize_row(row) for row in rows[:limit]],
+        'page': page,
+        'next_page': page + 1 if len(rows) > limit else None
+    })
+
+# Revenue analytics
+ANALYTICS_DEFAULT_BUCKETS = {'day': 30, 'week': 12, 'month': 12}
+
+def _buckets_before(period, start, count):
+    """Return the start of the bucket `count` periods before the bucket starting at `start`"""
+    if period == 'day':
+        return start - timedelta(days=count)
+    if period == 'week':
+        return start - timedelta(weeks=count)
+    month_index = start.year * 12 + start.month - 1 - count
+    return start.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+@app.route('/admin/analytics')
+@login_required
+def admin_analytics():
+    period = request.args.get('period', 'day')
+    group = request.args.get('group', 'product_type')
+    status_filter = request.args.get('status', 'completed')
+    if period not in ROLLUP_PERIODS or group not in ('product_type', 'product_name', 'total'):
+        return jsonify({'success': False, 'error': 'Invalid period or group'}), 400
+
+    try:
+        until = datetime.strptime(request.args['until'], '%Y-%m-%d') if request.args.get('until') else datetime.utcnow()
+        if request.args.get('since'):
+            first_bucket = bucket_start(period, datetime.strptime(request.args['since'], '%Y-%m-%d'))
+        else:
+            first_bucket = _buckets_before(period, bucket_start(period, until), ANALYTICS_DEFAULT_BUCKETS[period] - 1)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    columns = [OrderRollup.bucket_start]
+    if group != 'total':
+        columns.append(getattr(OrderRollup, group))
+    query = db.session.query(
+        *columns, db.func.sum(OrderRollup.order_count), db.func.sum(OrderRollup.revenue_cents)
+    ).filter(
+        OrderRollup.period == period,
+        OrderRollup.bucket_start >= first_bucket,
+        OrderRollup.bucket_start <= bucket_start(period, until)
+    )
+    if status_filter != 'all':
+        query = query.filter(OrderRollup.status == status_filter)
+    rows = query.group_by(*columns).having(db.func.sum(OrderRollup.order_count) != 0).order_by(OrderRollup.bucket_start).all()
+
+    buckets = []
+    for row in rows:
+        buckets.append({
+            'bucket': row[0].isoformat(),
+            'key': row[1] if group != 'total' else 'total',
+            'orders': int(row[-2] or 0),
+            'revenue': format_cents(row[-1])
+        })
+    return jsonify({'period': period, 'group': group, 'status': status_filter, 'buckets': buckets})
+
+# Streaming exports
+ORDER_EXPORT_FIELDS = ('id', 'created_at', 'customer_name', 'email', 'phone', 'product_type',
+                       'product_name', 'price', 'status', 'notes')
+MESSAGE_EXPORT_FIELDS = ('id', 'created_at', 'name', 'email', 'subject', 'message', 'read')
+
+def _export_date_range(query, column):
+    """Apply ?since=YYYY-MM-DD&until=YYYY-MM-DD (both inclusive) to a select"""
+    try:
+        if request.args.get('since'):
+            query = query.where(column >= datetime.strptime(request.args['since'], '%Y-%m-%d'))
+        if request.args.get('until'):
+            query = query.where(column < datetime.strptime(request.args['until'], '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        return None
+    return query
+
+def _export_chunks(statement, fields, to_record, fmt):
+    """Yield CSV or JSONL text in batches while rows stream from the database"""
+    batch_size = app.config['EXPORT_BATCH_SIZE']
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        for row in partition:
+            record = to_record(row)
+            if writer:
+                writer.writerow(record[field] for field in fields)
+            else:
+                buffer.write(json.dumps(record, default=str))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _export_response(statement, fields, to_record, basename):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'success': False, 'error': 'format must be csv or jsonl'}), 400
+
+    chunks = _export_chunks(statement, fields, to_record, fmt)
+    filename = f"{basename}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks = _gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def _order_export_record(row):
+    record = row._asdict()
+    record['price'] = format_cents(record.pop('price_cents'))
+    record['created_at'] = row.created_at.isoformat() if row.created_at else ''
+    return record
+
+def _message_export_record(row):
+    record = row._asdict()
+    record['created_at'] = row.created_at.isoformat() if row.created_at else ''
+    return record
+
+@app.route('/admin/orders/export')
+@login_required
+def export_orders():
+    statement = db.select(
+        Order.id, Order.created_at, Order.customer_name, Order.email, Order.phone, Order.product_type,
+        Order.product_name, Order.price_cents, Order.status, Order.notes
+    ).order_by(Order.id)
+    status_filter = request.args.get('status', 'all')
+    if status_filter != 'all':
+        statement = statement.where(Order.status == status_filter)
+    statement = _export_date_range(statement, Order.created_at)
+    if statement is None:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+    return _export_response(statement, ORDER_EXPORT_FIELDS, _order_export_record, 'orders')
+
+@app.route('/admin/messages/export')
+@login_required
+def export_messages():
+    statement = db.select(
+        ContactMessage.id, ContactMessage.created_at, ContactMessage.name, ContactMessage.email,
+        ContactMessage.subject, ContactMessage.message, ContactMessage.read
+    ).order_by(ContactMessage.id)
+    read_filter = request.args.get('read', 'all')
+    if read_filter == 'unread':
+        statement = statement.where(ContactMessage.read == False)
+    elif read_filter != 'all':
+        statement = statement.where(ContactMessage.read == True)
+    statement = _export_date_range(statement, ContactMessage.created_at)
+    if statement is None:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+    return _export_response(statement, MESSAGE_EXPORT_FIELDS, _message_export_record, 'messages')
+
+# Archival
+# Old finished rows are moved out of the live tables in chunks, each chunk in its
+# own short transaction, so the live tables are never locked for long. Archived
+# orders leave the stats counters and search index but stay in the analytics
+# rollups. The archive can be queried from /admin/archive.
+ARCHIVE_MODELS = {
+    'orders': (Order, ArchivedOrder, ('customer_name', 'email', 'phone', 'product_name')),
+    'messages': (ContactMessage, ArchivedContactMessage, ('name', 'email', 'subject')),
+}
+
+def _archive_condition(kind, cutoff):
+    if kind == 'orders':
+        return db.and_(Order.status.in_(('completed', 'cancelled')), Order.created_at < cutoff)
+    return db.and_(ContactMessage.read == True, ContactMessage.created_at < cutoff)
+
+@contextmanager
+def _archive_dir_lock():
+    """Serialize file archive runs across processes (the CLI, cron and the admin endpoint)"""
+    os.makedirs(app.config['ARCHIVE_DIR'], exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(app.config['ARCHIVE_DIR'], 'archive.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_archive_part(kind, rows):
+    """Write one chunk to a new gzipped JSONL `<name>.part` file, synced to disk; return the final name
+
+    The rows must be on disk before the transaction that deletes them commits,
+    but the file only takes its final name once that commit succeeded.
+    """
+    stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')
+    path = os.path.join(app.config['ARCHIVE_DIR'], f'{kind}-{stamp}-{uuid.uuid4().hex[:8]}.jsonl.gz')
+    with open(path + '.part', 'xb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            for row in rows:
+                f.write(json.dumps(dict(row), default=str).encode('utf-8') + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    return path
+
+def _recover_archive_parts(kind):
+    """Finish chunks an earlier run wrote but never renamed, e.g. after a crash
+
+    A chunk's delete is one transaction, so if none of its rows are still live
+    the commit went through and the file is published; otherwise it is dropped.
+    Rows are matched on id and created_at, as SQLite may reuse a deleted id.
+    """
+    model = ARCHIVE_MODELS[kind][0]
+    directory = app.config['ARCHIVE_DIR']
+    for name in os.listdir(directory):
+        if not (name.startswith(f'{kind}-') and name.endswith('.jsonl.gz.part')):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                archived = {(record['id'], record['created_at']) for record in map(json.loads, f)}
+        except (OSError, EOFError, ValueError, KeyError):
+            archived = None  # Torn write, so the delete never ran
+        live = archived and db.session.query(model.id, model.created_at).filter(
+            model.id.in_([row_id for row_id, _ in archived])).all()
+        if archived and not any((row_id, str(created_at)) in archived for row_id, created_at in live):
+            os.replace(path, path[:-len('.part')])
+        else:
+            os.remove(path)
+
+def archive_rows(kind, cutoff, target, chunk_size):
+    """Move the `kind` rows eligible at `cutoff` to the archive; return how many moved"""
+    if target != 'file':
+        return _move_archive_chunks(kind, cutoff, target, chunk_size)
+    with _archive_dir_lock():
+        _recover_archive_parts(kind)
+        return _move_archive_chunks(kind, cutoff, target, chunk_size)
+
+def _move_archive_chunks(kind, cutoff, target, chunk_size):
+    model, archive_model, _ = ARCHIVE_MODELS[kind]
+    condition = _archive_condition(kind, cutoff)
+    moved = 0
+    while True:
+        # Lock the chunk before reading it, so a concurrent status change can't
+        # slip in between the copy, the counter adjustment and the delete
+        if db.engine.dialect.name == 'sqlite':
+            db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+        rows = db.session.execute(
+            db.select(model.__table__).where(condition).order_by(model.id).limit(chunk_size).with_for_update()
+        ).mappings().all()
+        if not rows:
+            db.session.rollback()
+            break
+        ids = [row['id'] for row in rows]
+        archive_path = None
+        try:
+            if target == 'file':
+                archive_path = _write_archive_part(kind, rows)
+            else:
+                now = datetime.utcnow()
+                db.session.execute(archive_model.__table__.insert(), [dict(row, archived_at=now) for row in rows])
+            if model is Order:
+                for status, (count, revenue_cents) in _aggregate_orders(
+                        [SimpleNamespace(**row) for row in rows])[0].items():
+                    bump_order_stats(status, -count, -revenue_cents)
+            unindex_search_rows(model, ids)
+            deleted = db.session.execute(model.__table__.delete().where(model.id.in_(ids), condition)).rowcount
+            if deleted != len(ids):
+                raise RuntimeError(f'{len(ids) - deleted} {kind} changed while being archived; rerun to retry them')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if archive_path is not None:
+                os.remove(archive_path + '.part')
+            raise
+        if archive_path is not None:
+            os.replace(archive_path + '.part', archive_path)
+        moved += len(rows)
+    return moved
+
+@app.cli.command('archive-data')
+@click.option('--older-than-days', type=int, help='Age in days (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--target', type=click.Choice(['table', 'file']), help='Archive tables or JSONL.gz files (default: ARCHIVE_TARGET).')
+@click.option('--chunk-size', type=int, help='Rows moved per transaction (default: ARCHIVE_CHUNK_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Only count the rows that would be archived.')
+def archive_data_command(older_than_days, target, chunk_size, dry_run):
+    """Archive old completed/cancelled orders and read messages; run it from cron."""
+    ensure_initialized()
+    days = older_than_days if older_than_days is not None else app.config['ARCHIVE_AFTER_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    for kind in ARCHIVE_MODELS:
+        if dry_run:
+            count = db.session.query(ARCHIVE_MODELS[kind][0].id).filter(_archive_condition(kind, cutoff)).count()
+            click.echo(f'{count} {kind} older than {days} days would be archived.')
+            continue
+        moved = archive_rows(kind, cutoff, target or app.config['ARCHIVE_TARGET'],
+                             chunk_size or app.config['ARCHIVE_CHUNK_SIZE'])
+        click.echo(f'Archived {moved} {kind}.')
+
+def _archive_file_matches(kind, terms, fields):
+    """Yield records from the JSONL.gz archives, newest file first, containing every term"""
+    directory = app.config['ARCHIVE_DIR']
+    names = sorted((n for n in os.listdir(directory) if n.startswith(f'{kind}-') and n.endswith('.jsonl.gz')),
+                   reverse=True) if os.path.isdir(directory) else []
+    for name in names:
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                haystack = ' '.join(str(record.get(field) or '') for field in fields).lower()
+                if all(term in haystack for term in terms):
+                    yield record
+
+@app.route('/admin/archive')
+@login_required
+def admin_archive():
+    """Query archived orders or messages, from the archive tables or the JSONL.gz files"""
+    kind = request.args.get('type', 'orders')
+    if kind not in ARCHIVE_MODELS:
+        return jsonify({'success': False, 'error': 'Unknown archive type'}), 400
+    _, archive_model, fields = ARCHIVE_MODELS[kind]
+    terms = [term.lower() for term in search_terms(request.args.get('q'))]
+    limit = app.config['ADMIN_PAGE_SIZE']
+    cursor = request.args.get('cursor')
+
+    if request.args.get('source', app.config['ARCHIVE_TARGET']) == 'file':
+        # Files are scanned on demand; the cursor is the number of matches already returned
+        skip = int(cursor) if cursor and cursor.isdigit() else 0
+        matches = itertools.islice(_archive_file_matches(kind, terms, fields), skip, skip + limit + 1)
+        items = list(matches)
+        next_cursor = str(skip + limit) if len(items) > limit else None
+        return jsonify({'items': items[:limit], 'next_cursor': next_cursor})
+
+    query = db.session.query(*archive_model.__table__.columns)
+    for term in terms:
+        query = query.filter(db.or_(*(
+            db.func.lower(getattr(archive_model, field)).contains(term, autoescape=True) for field in fields
+        )))
+    rows, next_cursor = _keyset_page(query, archive_model, cursor)
+    items = []
+    for row in rows:
+        item = _serialize_row(row)
+        item['archived_at'] = row.archived_at.isoformat()
+        items.append(item)
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
 @app.route('/admin/messages')
 @login_required
 def admin_messages():
     read_filter = request.args.get('read', 'all')
-    
-    if read_filter == 'all':
-        messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).all()
-    elif read_filter == 'unread':
-        messages = ContactMessage.query.filter_by(read=False).order_by(ContactMessage.created_at.desc()).all()
-    else:
-        messages = ContactMessage.query.filter_by(read=True).order_by(ContactMessage.created_at.desc()).all()
-    
-    return render_template('admin/messages.html', messages=messages, read_filter=read_filter)
+    messages, next_cursor = _keyset_page(_filtered_messages(read_filter), ContactMessage, request.args.get('cursor'))
+    return render_template('admin/messages.html', messages=messages, read_filter=read_filter, next_cursor=next_cursor)
+
+@app.route('/admin/messages/more')
+@login_required
+def admin_messages_more():
+    read_filter = request.args.get('read', 'all')
+    messages, next_cursor = _keyset_page(_filtered_messages(read_filter), ContactMessage, request.args.get('cursor'))
+    return jsonify({'items': [_serialize_row(message) for message in messages], 'next_cursor': next_cursor})
 
 @app.route('/admin/message/<int:message_id>')
 @login_required
@@ -708,6 +1996,8 @@ def admin_settings():
     settings = SiteSettings.query.first()
     
     if request.method == 'POST':
+        new_logo_path = None
+        new_music_path = None
         settings.site_name = request.form.get('site_name', 'Ntando Mods')
         settings.music_enabled = 'music_enabled' in request.form
         settings.whatsapp_notifications = 'whatsapp_notifications' in request.form
@@ -720,6 +2010,8 @@ def admin_settings():
                 logo_path = os.path.join('uploads', 'logos', filename)
                 logo.save(os.path.join('static', logo_path))
                 settings.logo_path = logo_path
+                settings.logo_variants = None
+                new_logo_path = logo_path
         
         # Handle music upload
         if 'background_music' in request.files:
@@ -729,8 +2021,17 @@ def admin_settings():
                 music_path = os.path.join('uploads', 'music', filename)
                 music.save(os.path.join('static', music_path))
                 settings.background_music_path = music_path
+                settings.music_stream_path = None
+                new_music_path = music_path
         
+        # Always move the generation stamp so every worker reloads its cache
+        settings.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_site_settings_cache()
+        if new_logo_path:
+            run_media_job(process_logo_upload, new_logo_path)
+        if new_music_path:
+            run_media_job(process_music_upload, new_music_path)
         flash('Settings updated successfully!', 'success')
         return redirect(url_for('admin_settings'))
     
@@ -0,0 +1,106 @@
+"""Static asset pipeline
+
+Minifies the site's CSS and JS, writes each file under static/dist with a hash
+of its content in the name, and stores gzip (and, when the brotli package is
+installed, brotli) siblings next to it. manifest.json maps the source names
+templates ask for to the built ones, so the app can rewrite url_for('static')
+and let browsers cache every built file forever.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli not installed; only gzip siblings are written
+    brotli = None
+
+ASSET_FILES = ('css/style.css', 'css/admin.css', 'js/main.js')
+OUTPUT_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# Precompressed siblings in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+# Whitespace before a colon can be a descendant combinator (".a :hover"), after it never matters
+_CSS_COLON = re.compile(r':\s+')
+
+
+def minify_css(text):
+    text = _CSS_COMMENT.sub('', text)
+    text = _CSS_SPACE.sub(' ', text)
+    text = _CSS_PUNCTUATION.sub(r'\1', text)
+    text = _CSS_COLON.sub(':', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """Drop indentation, blank lines and whole-line // comments; line breaks are kept for ASI"""
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write(path, data):
+    if os.path.exists(path):
+        return  # Same name means same content
+    temp_path = f'{path}.tmp{os.getpid()}'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def build_assets(static_dir, files=ASSET_FILES):
+    """Build every file in `files` (paths relative to `static_dir`) and return the manifest"""
+    manifest = {}
+    for name in files:
+        stem, extension = os.path.splitext(name)
+        with open(os.path.join(static_dir, name), encoding='utf-8') as f:
+            source = f.read()
+        minify = MINIFIERS.get(extension)
+        data = (minify(source) if minify else source).encode('utf-8')
+
+        built_name = f'{OUTPUT_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+        path = os.path.join(static_dir, built_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write(path, data)
+        _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(path + '.br', brotli.compress(data, quality=11))
+        manifest[name] = built_name
+
+    manifest_path = os.path.join(static_dir, OUTPUT_DIR, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    temp_path = f'{manifest_path}.tmp{os.getpid()}'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+    return manifest
+
+
+def load_manifest(static_dir, files=ASSET_FILES):
+    """Return the manifest written by build_assets(), or None when it is missing or older than a source"""
+    manifest_path = os.path.join(static_dir, OUTPUT_DIR, MANIFEST_NAME)
+    try:
+        built_at = os.path.getmtime(manifest_path)
+        if any(os.path.getmtime(os.path.join(static_dir, name)) > built_at for name in files):
+            return None
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if set(manifest) != set(files):
+        return None
+    return manifest
+
+
+def available_encodings(static_dir, built_name):
+    """Return the (encoding, suffix) pairs from ENCODINGS that exist on disk for `built_name`"""
+    path = os.path.join(static_dir, built_name)
+    return tuple((encoding, suffix) for encoding, suffix in ENCODINGS if os.path.exists(path + suffix))
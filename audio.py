@@ -0,0 +1,115 @@
+"""Background music transcoding
+
+Uploaded music is re-encoded into a small, bitrate-capped MP3 stream and written
+under a content-hashed file name so it can be cached forever. The encoder is a
+pluggable backend: ffmpeg when it is installed, a passthrough copy otherwise,
+and a stub for tests.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+DEFAULT_BITRATE = '96k'
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def _hashed_name(path, stem, extension):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return f'{stem}.{digest.hexdigest()[:12]}{extension}'
+
+
+class FfmpegTranscoder:
+    """Re-encodes audio to MP3 at a capped bitrate with the ffmpeg binary"""
+
+    extension = '.mp3'
+
+    def __init__(self, binary='ffmpeg', bitrate=DEFAULT_BITRATE, sample_rate=44100, timeout=300):
+        self.binary = binary
+        self.bitrate = bitrate
+        self.sample_rate = sample_rate
+        self.timeout = timeout
+
+    def transcode(self, source_path, output_path):
+        command = [
+            self.binary, '-nostdin', '-y', '-loglevel', 'error', '-i', source_path,
+            '-vn', '-map_metadata', '-1', '-codec:a', 'libmp3lame', '-b:a', self.bitrate,
+            '-ar', str(self.sample_rate), '-f', 'mp3', output_path,
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True, timeout=self.timeout)
+        except FileNotFoundError as e:
+            raise TranscodeError(f'{self.binary} is not installed') from e
+        except subprocess.TimeoutExpired as e:
+            raise TranscodeError(f'Transcoding {source_path} timed out') from e
+        except subprocess.CalledProcessError as e:
+            raise TranscodeError(e.stderr.decode('utf-8', 'replace').strip() or str(e)) from e
+
+
+class PassthroughTranscoder:
+    """Copies the upload unchanged; used when no encoder is available"""
+
+    extension = None
+
+    def transcode(self, source_path, output_path):
+        shutil.copyfile(source_path, output_path)
+
+
+class StubTranscoder:
+    """Writes fixed bytes instead of encoding and records every call"""
+
+    extension = '.mp3'
+
+    def __init__(self, data=b'ID3stub', fail=False):
+        self.data = data
+        self.fail = fail
+        self.calls = []
+
+    def transcode(self, source_path, output_path):
+        self.calls.append((source_path, output_path))
+        if self.fail:
+            raise TranscodeError('Stub failure')
+        with open(output_path, 'wb') as f:
+            f.write(self.data)
+
+
+def build_transcoder(config):
+    """Return the transcoder named by MUSIC_TRANSCODER ('auto' picks ffmpeg when installed)"""
+    name = config.get('MUSIC_TRANSCODER', 'auto')
+    if not isinstance(name, str):
+        return name  # An already built transcoder object
+    bitrate = config.get('MUSIC_BITRATE', DEFAULT_BITRATE)
+    if name == 'auto':
+        name = 'ffmpeg' if shutil.which('ffmpeg') else 'passthrough'
+    if name == 'ffmpeg':
+        return FfmpegTranscoder(bitrate=bitrate)
+    if name == 'passthrough':
+        return PassthroughTranscoder()
+    if name == 'stub':
+        return StubTranscoder()
+    raise ValueError(f'Unknown music transcoder {name!r}')
+
+
+def transcode_music(transcoder, source_path, output_dir):
+    """Transcode `source_path` into `output_dir` and return the hashed file name"""
+    stem, source_extension = os.path.splitext(os.path.basename(source_path))
+    extension = transcoder.extension or source_extension.lower()
+    fd, temp_path = tempfile.mkstemp(suffix=extension, dir=output_dir)
+    os.close(fd)
+    try:
+        transcoder.transcode(source_path, temp_path)
+        if not os.path.getsize(temp_path):
+            raise TranscodeError(f'Transcoding {source_path} produced no output')
+        filename = _hashed_name(temp_path, stem, extension)
+        os.replace(temp_path, os.path.join(output_dir, filename))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return filename
@@ -0,0 +1,86 @@
+"""Compare CPU per request against bytes saved for response compression
+
+Renders the public pages once, then runs the same WSGI responses through
+CompressionMiddleware with each encoding, with and without the ETag keyed
+cache, and reports CPU time per request next to the transferred size:
+
+    python benchmarks/bench_compression.py --requests 500
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+PAGES = ['/', '/whatsapp-bots', '/domains', '/websites', '/hosting', '/premium-apps', '/about']
+
+
+def capture_pages(client):
+    """Return {path: (headers, body)} for every page as the app serves it uncompressed"""
+    pages = {}
+    for path in PAGES:
+        response = client.get(path)
+        pages[path] = (list(response.headers.items()), response.get_data())
+    return pages
+
+
+def replay_app(pages):
+    """WSGI app that returns the captured responses, so only compression costs CPU"""
+    def app(environ, start_response):
+        headers, body = pages[environ['PATH_INFO']]
+        start_response('200 OK', list(headers))
+        return [body]
+    return app
+
+
+def run(middleware, accept_encoding, requests):
+    sizes = 0
+    started = time.process_time()
+    for i in range(requests):
+        path = PAGES[i % len(PAGES)]
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'HTTP_ACCEPT_ENCODING': accept_encoding,
+                   'wsgi.input': io.BytesIO()}
+        sizes += sum(len(chunk) for chunk in middleware(environ, lambda status, headers, exc_info=None: None))
+    return (time.process_time() - started) / requests, sizes / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-compression-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['COMPRESSION'] = '0'
+    try:
+        import app as app_module
+        import compression
+        pages = capture_pages(app_module.app.test_client())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    replay = replay_app(pages)
+    identity_cpu, identity_size = run(compression.CompressionMiddleware(replay), 'identity', args.requests)
+    variants = [('gzip', 'gzip', {'gzip_level': 6}), ('gzip', 'gzip -9', {'gzip_level': 9})]
+    if compression.brotli is not None:
+        variants += [('br', 'brotli q5', {'brotli_quality': 5}), ('br', 'brotli q11', {'brotli_quality': 11})]
+    else:
+        print('brotli is not installed; only gzip is measured')
+
+    print(f"\n{'encoding':<12} {'cache':<6} {'CPU/request':>12} {'bytes/request':>14} {'saved':>7}")
+    print(f"{'identity':<12} {'-':<6} {identity_cpu * 1e6:10.0f} us {identity_size:14.0f} {0:6.0%}")
+    for accept, label, options in variants:
+        for cache_size in (0, 256):
+            middleware = compression.CompressionMiddleware(replay, cache_size=cache_size, **options)
+            cpu, size = run(middleware, accept, args.requests)
+            print(f"{label:<12} {'on' if cache_size else 'off':<6} {cpu * 1e6:10.0f} us {size:14.0f} "
+                  f"{1 - size / identity_size:6.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compare per-request commits with group commit for order submissions
+
+Runs one process per profile with many threads (like a gunicorn gthread
+worker) that POST /submit-order through the test client, and reports
+throughput and latency percentiles. Each commit mode is measured with
+synchronous=FULL, where every commit is an fsync, and with NORMAL:
+
+    python benchmarks/bench_group_commit.py --threads 16 --orders 100
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROFILES = {
+    'per-request FULL': {'GROUP_COMMIT': '0', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'group FULL': {'GROUP_COMMIT': '1', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'per-request NORMAL': {'GROUP_COMMIT': '0', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+    'group NORMAL': {'GROUP_COMMIT': '1', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def run_process(environ, threads, orders, results):
+    os.environ.update(environ)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    from app import app
+    app.test_client().get('/about')
+
+    barrier = threading.Barrier(threads + 1)
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def client_thread():
+        client = app.test_client()
+        local, failed = [], 0
+        barrier.wait()
+        for i in range(orders):
+            started = time.perf_counter()
+            response = client.post('/submit-order', data={
+                'name': f'Bench {i}', 'email': 'bench@example.com', 'phone': '263700000000',
+                'product_type': 'bot', 'product_id': 'basic'
+            })
+            local.append(time.perf_counter() - started)
+            failed += response.status_code != 200
+        with lock:
+            latencies.extend(local)
+            failures.append(failed)
+
+    workers = [threading.Thread(target=client_thread) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    results.put((time.perf_counter() - started, sorted(latencies), sum(failures)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders', type=int, default=100, help='Orders submitted by each thread')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-group-commit-')
+    context = multiprocessing.get_context('spawn')
+    try:
+        print(f"{'profile':<20}{'ok':>7}{'failed':>8}{'orders/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for name, overrides in PROFILES.items():
+            environ = dict(overrides, DATABASE_URL=f"sqlite:///{os.path.join(workdir, name.replace(' ', '-') + '.db')}",
+                           NOTIFICATION_WORKER='off', RATE_LIMIT_BACKEND='off', INSTRUMENTATION='0')
+            results = context.Queue()
+            process = context.Process(target=run_process, args=(environ, args.threads, args.orders, results))
+            process.start()
+            elapsed, latencies, failed = results.get()
+            process.join()
+            ok = len(latencies) - failed
+            print(f'{name:<20}{ok:>7}{failed:>8}{ok / elapsed:>10.1f}'
+                  f'{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
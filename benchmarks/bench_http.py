@@ -0,0 +1,157 @@
+"""HTTP load benchmark for the public pages and submit_order
+
+Drives a running server (or one it starts with --spawn) at increasing
+concurrency levels and reports latency percentiles and requests per second,
+so gunicorn settings can be compared:
+
+    python benchmarks/bench_http.py --spawn --concurrency 1 4 16 64
+    python benchmarks/bench_http.py --url http://127.0.0.1:8000 --duration 20
+    WEB_CONCURRENCY=2 GUNICORN_THREADS=8 python benchmarks/bench_http.py --spawn
+"""
+import argparse
+import http.client
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PAGES = ['/', '/whatsapp-bots', '/domains', '/websites', '/hosting', '/premium-apps', '/about']
+ORDER_FORM = urllib.parse.urlencode({
+    'name': 'Bench Customer', 'email': 'bench@example.com', 'phone': '263700000000',
+    'product_type': 'bot', 'product_id': 'basic'
+})
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def client_loop(host, port, deadline, order_ratio, latencies, errors, lock):
+    rng = random.Random()
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if rng.random() < order_ratio:
+                connection.request('POST', '/submit-order', ORDER_FORM,
+                                   {'Content-Type': 'application/x-www-form-urlencoded'})
+            else:
+                connection.request('GET', rng.choice(PAGES))
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except http.client.RemoteDisconnected:
+            # The server closed an idle keep-alive connection (e.g. a worker hit
+            # max_requests); reconnect like a browser would
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        local_latencies.append(time.perf_counter() - started)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def run_level(host, port, concurrency, duration, order_ratio):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client_loop, args=(host, port, deadline, order_ratio, latencies, errors, lock))
+               for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p95': percentile(latencies, 0.95) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(workdir):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               GUNICORN_ACCESSLOG='', NOTIFICATION_WORKER='off', RATE_LIMIT_BACKEND='off')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(300):
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/about')
+            connection.getresponse().read()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--spawn', action='store_true', help='Start gunicorn with gunicorn.conf.py on a scratch database')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--order-ratio', type=float, default=0.1, help='Fraction of requests that submit an order')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-http-')
+    process = None
+    try:
+        if args.spawn:
+            process, port = spawn_server(workdir)
+            host = '127.0.0.1'
+        else:
+            parsed = urllib.parse.urlparse(args.url)
+            host, port = parsed.hostname, parsed.port or 80
+
+        print(f"{'concurrency':>12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for concurrency in args.concurrency:
+            result = run_level(host, port, concurrency, args.duration, args.order_ratio)
+            print(f"{concurrency:>12}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+                  f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark admin list queries on a large orders table with and without indexes
+
+Seeds a throwaway SQLite database (1M orders and 100k messages by default),
+times the queries the admin pages run with the model indexes dropped, then
+recreates the indexes and times them again.
+
+    python benchmarks/bench_indexes.py --orders 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import create_engine, func, or_, and_, select, text
+
+STATUSES = ('pending', 'completed', 'cancelled')
+
+
+def seed(engine, Order, ContactMessage, orders, messages):
+    start = datetime(2023, 1, 1)
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        for table, total, make in (
+            (Order.__table__, orders, lambda i: {
+                'customer_name': f'Customer {i}', 'email': f'c{i}@example.com', 'phone': '263700000000',
+                'product_type': 'bot', 'product_name': 'Basic Bot', 'price_cents': 1500,
+                'status': rng.choices(STATUSES, (1, 8, 1))[0],
+                'created_at': start + timedelta(seconds=i * 30), 'notes': ''
+            }),
+            (ContactMessage.__table__, messages, lambda i: {
+                'name': f'Sender {i}', 'email': f's{i}@example.com', 'subject': 'Hello',
+                'message': 'Message body ' * 10, 'created_at': start + timedelta(seconds=i * 300),
+                'read': rng.random() < 0.9
+            }),
+        ):
+            batch = []
+            for i in range(total):
+                batch.append(make(i))
+                if len(batch) == 10000:
+                    connection.execute(table.insert(), batch)
+                    batch = []
+            if batch:
+                connection.execute(table.insert(), batch)
+
+
+def queries(Order, ContactMessage):
+    middle = datetime(2023, 6, 1)
+    return [
+        ('dashboard recent orders', select(Order.id).order_by(Order.created_at.desc(), Order.id.desc()).limit(11)),
+        ('pending orders page', select(Order.id).where(Order.status == 'pending')
+            .order_by(Order.created_at.desc(), Order.id.desc()).limit(51)),
+        ('pending orders keyset page', select(Order.id).where(Order.status == 'pending', or_(
+            Order.created_at < middle, and_(Order.created_at == middle, Order.id < 10 ** 9)))
+            .order_by(Order.created_at.desc(), Order.id.desc()).limit(51)),
+        ('unread messages count', select(func.count()).select_from(ContactMessage).where(ContactMessage.read == False)),
+        ('unread messages page', select(ContactMessage.id).where(ContactMessage.read == False)
+            .order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc()).limit(51)),
+    ]
+
+
+def time_queries(engine, statements, repeat):
+    results = {}
+    with engine.connect() as connection:
+        for name, statement in statements:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(statement).fetchall()
+                timings.append(time.perf_counter() - started)
+            results[name] = sorted(timings)[len(timings) // 2] * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-indexes-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'app.db')}"
+    from app import Order, ContactMessage
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Order.__table__.create(engine)
+    ContactMessage.__table__.create(engine)
+    indexes = list(Order.__table__.indexes) + list(ContactMessage.__table__.indexes)
+
+    started = time.perf_counter()
+    seed(engine, Order, ContactMessage, args.orders, args.messages)
+    print(f'Seeded {args.orders} orders and {args.messages} messages in {time.perf_counter() - started:.1f}s')
+
+    for index in indexes:
+        index.drop(engine)
+    with engine.begin() as connection:
+        connection.execute(text('ANALYZE'))
+    before = time_queries(engine, queries(Order, ContactMessage), args.repeat)
+
+    for index in indexes:
+        index.create(engine)
+    with engine.begin() as connection:
+        connection.execute(text('ANALYZE'))
+    after = time_queries(engine, queries(Order, ContactMessage), args.repeat)
+
+    print(f"\n{'query':<30}{'no index (ms)':>15}{'indexed (ms)':>15}{'speedup':>10}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f'{name:<30}{before[name]:>15.2f}{after[name]:>15.2f}{speedup:>9.1f}x')
+
+    engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Load test concurrent order submissions against a local SQLite file
+
+Starts several worker processes (like gunicorn sync workers) that each POST
+/submit-order through the test client, first with SQLite's defaults (rollback
+journal, synchronous=FULL) and then with the WAL profile from database.py, and
+reports throughput and failed requests for both.
+
+    python benchmarks/bench_sqlite_concurrency.py --workers 4 --orders 250
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROFILES = {
+    'default journal': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'WAL + NORMAL': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+
+
+def worker(environ, orders, start_event, results):
+    os.environ.update(environ)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    from app import app
+    client = app.test_client()
+    client.get('/about')
+    start_event.wait()
+
+    ok = failed = 0
+    for i in range(orders):
+        response = client.post('/submit-order', data={
+            'name': f'Load {i}', 'email': 'load@example.com', 'phone': '263700000000',
+            'product_type': 'bot', 'product_id': 'basic'
+        })
+        if response.status_code == 200:
+            ok += 1
+        else:
+            failed += 1
+    results.put((ok, failed))
+
+
+def run_profile(name, overrides, args, workdir):
+    environ = dict(overrides, DATABASE_URL=f"sqlite:///{os.path.join(workdir, name.replace(' ', '-') + '.db')}",
+                   NOTIFICATION_WORKER='off', RATE_LIMIT_BACKEND='off')
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(environ, args.orders, start_event, results))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    time.sleep(args.warmup)
+
+    started = time.perf_counter()
+    start_event.set()
+    totals = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    ok = sum(t[0] for t in totals)
+    failed = sum(t[1] for t in totals)
+    print(f'{name:<18}{ok:>8}{failed:>8}{elapsed:>10.2f}{ok / elapsed:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--orders', type=int, default=250, help='Orders submitted by each worker')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Seconds to let workers import and initialize')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-sqlite-')
+    try:
+        print(f"{'profile':<18}{'ok':>8}{'failed':>8}{'seconds':>10}{'orders/s':>12}")
+        for name, overrides in PROFILES.items():
+            run_profile(name, overrides, args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
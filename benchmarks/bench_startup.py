@@ -0,0 +1,70 @@
+"""Measure cold start: module import and time to the first response
+
+Each run starts a fresh interpreter (like a gunicorn worker booting), imports
+app, and issues GET / through the test client. Runs against an empty database
+first (schema creation and seeding happen on that first request) and then an
+already initialized one.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/')
+first = time.perf_counter()
+client.get('/')
+second = time.perf_counter()
+print(json.dumps({'import': imported - started, 'first': first - started, 'second': second - first}))
+'''
+
+
+def run_child(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run([sys.executable, '-c', CHILD, ROOT], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(label, samples):
+    print(f'\n{label}')
+    for key, title in (('import', 'import app'), ('first', 'import to first response'), ('second', 'second response')):
+        values = [sample[key] * 1000 for sample in samples]
+        print(f'  {title:<26} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    try:
+        fresh = []
+        for i in range(args.runs):
+            fresh.append(run_child(f"sqlite:///{os.path.join(workdir, f'fresh-{i}.db')}"))
+        report('Empty database', fresh)
+
+        existing_url = f"sqlite:///{os.path.join(workdir, 'existing.db')}"
+        run_child(existing_url)
+        report('Initialized database', [run_child(existing_url) for _ in range(args.runs)])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
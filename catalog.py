@@ -0,0 +1,89 @@
+"""Product catalog registry
+
+Products are loaded once from a JSON data file into immutable records and
+indexed by (product_type, product_id), so lookups stay constant time no matter
+how many SKUs the catalog holds.
+"""
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    type: str
+    id: str
+    name: str
+    price: float
+    price_cents: int
+    features: tuple
+    popular: bool = False
+    period: str | None = None
+    icon: str | None = None
+    color: str | None = None
+    position: int = 0
+
+
+class Catalog:
+    """Read-only index of products keyed by (product_type, product_id)"""
+    __slots__ = ('_products', '_views')
+
+    def __init__(self, products):
+        self._products = {}
+        grouped = {}
+        for product in products:
+            key = (product.type, product.id)
+            if key in self._products:
+                raise ValueError(f'Duplicate product {product.type}/{product.id} in catalog')
+            self._products[key] = product
+            grouped.setdefault(product.type, []).append(product)
+
+        # Views are precomputed once so catalog pages never sort per request
+        self._views = {}
+        for product_type, items in grouped.items():
+            self._views[(product_type, 'position')] = tuple(sorted(items, key=lambda p: p.position))
+            self._views[(product_type, 'price')] = tuple(sorted(items, key=lambda p: (p.price_cents, p.position)))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a catalog from {product_type: [product, ...]}"""
+        products = []
+        for product_type, items in data.items():
+            for position, item in enumerate(items):
+                products.append(Product(
+                    type=product_type,
+                    id=item['id'],
+                    name=item['name'],
+                    price=item['price'],
+                    price_cents=int(Decimal(str(item['price'])) * 100),
+                    features=tuple(item.get('features', ())),
+                    popular=bool(item.get('popular', False)),
+                    period=item.get('period'),
+                    icon=item.get('icon'),
+                    color=item.get('color'),
+                    position=item.get('position', position)
+                ))
+        return cls(products)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def get(self, product_type, product_id):
+        """Return the product or None"""
+        return self._products.get((product_type, product_id))
+
+    def category(self, product_type, order_by='position'):
+        """Return the products of one type, in display or price order"""
+        return self._views.get((product_type, order_by), ())
+
+    @property
+    def types(self):
+        return tuple(sorted({product_type for product_type, _ in self._products}))
+
+    def __iter__(self):
+        return iter(self._products.values())
+
+    def __len__(self):
+        return len(self._products)
@@ -0,0 +1,147 @@
+"""WSGI response compression
+
+CompressionMiddleware gzip- or brotli-encodes responses whose type is on an
+allowlist and whose size is known (Content-Length) and above a threshold.
+Streamed responses, partial content and bodies the app already encoded pass
+through untouched. Compressed bodies of responses that carry an ETag are kept
+in an LRU cache keyed by (ETag, length, encoding), so a cached catalog page is
+compressed once rather than on every request.
+"""
+import gzip
+
+from werkzeug.http import parse_accept_header
+
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # brotli not installed; only gzip is offered
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+)
+
+
+def _header(headers, name):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _without(headers, *names):
+    names = {name.lower() for name in names}
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size=500, mimetypes=DEFAULT_MIMETYPES, gzip_level=6, brotli_quality=5,
+                 cache_size=256):
+        self.app = app
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = LRUCache(cache_size) if cache_size else None
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def choose_encoding(self, accept_encoding):
+        """Return the supported encoding the client prefers (ties go to brotli), or None"""
+        accept = parse_accept_header(accept_encoding or '')
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _compressible(self, environ, status, headers):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or not status.startswith('200'):
+            return False
+        if _header(headers, 'Content-Encoding') or 'no-transform' in (_header(headers, 'Cache-Control') or ''):
+            return False
+        content_type = (_header(headers, 'Content-Type') or '').split(';')[0].strip().lower()
+        length = _header(headers, 'Content-Length')
+        return content_type in self.mimetypes and length is not None and int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        captured = []
+        written = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        app_iter = self.app(environ, capture_start_response)
+        if not captured:
+            # start_response is deferred to the first chunk; look ahead one chunk
+            iterator = iter(app_iter)
+            first = next(iterator, b'')
+            app_iter = _Chained(first, iterator, app_iter)
+        status, headers, exc_info = captured
+
+        if written or not self._compressible(environ, status, headers):
+            write = start_response(status, headers, exc_info)
+            for chunk in written:
+                write(chunk)
+            return app_iter
+
+        vary = _header(headers, 'Vary')
+        if not vary:
+            headers = headers + [('Vary', 'Accept-Encoding')]
+        elif 'accept-encoding' not in vary.lower():
+            headers = _without(headers, 'Vary') + [('Vary', f'{vary}, Accept-Encoding')]
+
+        encoding = self.choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        etag = _header(headers, 'ETag')
+        key = (etag, len(body), encoding)
+        compressed = self.cache.get(key) if etag and self.cache is not None else None
+        if compressed is None:
+            compressed = self.compress(body, encoding)
+            if etag and self.cache is not None:
+                self.cache.set(key, compressed)
+
+        headers = _without(headers, 'Content-Length', 'ETag')
+        headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(len(compressed))))
+        if etag:
+            # The encoded bytes differ from the identity body, so only a weak validator still holds
+            headers.append(('ETag', etag if etag.startswith('W/') else f'W/{etag}'))
+        start_response(status, headers, exc_info)
+        return [compressed]
+
+
+class _Chained:
+    """Iterable that yields `first` before the rest of a partly consumed app_iter and forwards close()"""
+
+    def __init__(self, first, iterator, app_iter):
+        self.first = first
+        self.iterator = iterator
+        self.app_iter = app_iter
+
+    def __iter__(self):
+        if self.first:
+            yield self.first
+        yield from self.iterator
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
@@ -0,0 +1,59 @@
+"""Database engine configuration
+
+Builds SQLALCHEMY_ENGINE_OPTIONS for the configured database and tunes every new
+SQLite connection for several gunicorn workers sharing one file: WAL lets
+readers run alongside the single writer, busy_timeout makes writers wait for the
+lock instead of failing with "database is locked", and synchronous=NORMAL
+drops the fsync on every commit that WAL makes unnecessary.
+"""
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def normalize_database_url(url):
+    """Accept the postgres:// scheme some hosts hand out, which SQLAlchemy rejects"""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, environ=os.environ):
+    """Return create_engine() keyword arguments for `url`"""
+    if url.startswith('sqlite'):
+        return {
+            'connect_args': {
+                # Pooled connections are handed between request and worker threads
+                'check_same_thread': False,
+                'timeout': int(environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000,
+            },
+        }
+    return {
+        'pool_size': int(environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+
+def sqlite_pragmas(environ=os.environ):
+    return {
+        'journal_mode': environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': int(environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'synchronous': environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    }
+
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
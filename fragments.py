@@ -0,0 +1,42 @@
+"""Jinja fragment caching
+
+    {% cache 'nav', request.endpoint %} ... {% endcache %}
+
+renders the block once per distinct key and reuses the markup afterwards. The
+key is the template name and tag position, the values given to the tag and the
+environment's current generation, so bumping the generation (for example when
+site settings change) simply stops matching the old entries and the LRU cache
+evicts them.
+"""
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        # Set by the app: an LRUCache-like object (None disables caching) and a
+        # callable returning the current generation stamp
+        environment.extend(fragment_cache=None, fragment_cache_generation=lambda: None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        keys = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        key = nodes.Tuple([nodes.Const(parser.name), nodes.Const(lineno), *keys], 'load')
+        return nodes.CallBlock(self.call_method('_cached', [key]), [], [], body).set_lineno(lineno)
+
+    def _cached(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = (key, self.environment.fragment_cache_generation())
+        markup = cache.get(key)
+        if markup is None:
+            markup = caller()
+            cache.set(key, markup)
+        return markup
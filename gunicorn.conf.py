@@ -0,0 +1,33 @@
+"""Gunicorn settings, sized from the host's CPU count
+
+Every value can be overridden from the environment so a deploy can be tuned
+without a code change; compare settings with benchmarks/bench_http.py.
+"""
+import multiprocessing
+import os
+
+# gthread workers let a slow client or upload tie up a thread instead of a whole process
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 9)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Importing app does no database work and background threads start on the first
+# request, so loading the app once before forking is safe and saves memory
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers now and then to bound slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+
+
+def post_fork(server, worker):
+    # Never share pooled connections opened in the master with the children
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
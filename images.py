@@ -0,0 +1,79 @@
+"""Logo image processing
+
+Turns an uploaded logo into the small variants the templates actually use:
+square PNG favicons and a header-sized logo at 1x and 2x, each also as WebP.
+Every file name carries a hash of its content so it can be cached forever.
+Pillow is optional; without it the original upload is served as before.
+"""
+import hashlib
+import io
+import os
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow not installed
+    Image = None
+
+FAVICON_SIZES = (16, 32, 48, 180)
+HEADER_HEIGHT = 48
+
+
+class ImageProcessingError(Exception):
+    pass
+
+
+def _fit_height(image, height):
+    if image.height <= height:
+        return image.copy()
+    width = max(1, round(image.width * height / image.height))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def _square(image, size):
+    thumbnail = image.copy()
+    thumbnail.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(thumbnail, ((size - thumbnail.width) // 2, (size - thumbnail.height) // 2))
+    return canvas
+
+
+def _save_variant(image, output_dir, stem, label, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, fmt, quality=85, method=6)
+    else:
+        image.save(buffer, fmt, optimize=True)
+    data = buffer.getvalue()
+    extension = fmt.lower()
+    filename = f'{stem}-{label}.{hashlib.sha256(data).hexdigest()[:12]}.{extension}'
+    path = os.path.join(output_dir, filename)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return filename
+
+
+def process_logo(source_path, output_dir, header_height=HEADER_HEIGHT):
+    """Write the logo variants next to the upload and return their file names
+
+    Returns {'favicon': {'16': name, ...}, 'header': {'1x': name, '2x': name,
+    '1x_webp': name, '2x_webp': name}} with names relative to `output_dir`.
+    """
+    if Image is None:
+        raise ImageProcessingError('Pillow is not installed')
+    try:
+        with Image.open(source_path) as image:
+            image.load()
+            image = image.convert('RGBA')
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError(f'Cannot read {source_path}: {e}') from e
+
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    variants = {'favicon': {}, 'header': {}}
+    for size in FAVICON_SIZES:
+        variants['favicon'][str(size)] = _save_variant(_square(image, size), output_dir, stem, f'{size}', 'PNG')
+    for scale in (1, 2):
+        resized = _fit_height(image, header_height * scale)
+        variants['header'][f'{scale}x'] = _save_variant(resized, output_dir, stem, f'header-{scale}x', 'PNG')
+        variants['header'][f'{scale}x_webp'] = _save_variant(resized, output_dir, stem, f'header-{scale}x', 'WEBP')
+    return variants
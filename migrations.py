@@ -0,0 +1,103 @@
+"""Versioned schema migrations
+
+db.create_all() only creates missing tables, so changes to existing tables are
+applied here. Each migration runs once, in order, and the last applied version
+is recorded in the schema_version table. Migrations should be safe to run on a
+database freshly created by create_all() from the current models.
+"""
+from sqlalchemy import inspect, text
+
+from search import SEARCH_INDEXES, create_index, fts5_available
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def decorator(f):
+        MIGRATIONS.append((version, description, f))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return f
+    return decorator
+
+
+def _columns(connection, table):
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+
+def current_version(connection):
+    connection.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+    version = connection.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+    return version or 0
+
+
+def pending_migrations(engine):
+    with engine.begin() as connection:
+        version = current_version(connection)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+
+def upgrade(engine):
+    """Apply all pending migrations, each in its own transaction; return what ran"""
+    applied = []
+    for version, description, f in pending_migrations(engine):
+        with engine.begin() as connection:
+            f(connection)
+            connection.execute(text('DELETE FROM schema_version'))
+            connection.execute(text('INSERT INTO schema_version (version) VALUES (:version)'), {'version': version})
+        applied.append((version, description))
+    return applied
+
+
+@migration(1, 'Store order prices as integer cents')
+def order_price_cents(connection):
+    columns = _columns(connection, 'order')
+    if 'price_cents' in columns or 'price' not in columns:
+        return
+    connection.execute(text('ALTER TABLE "order" ADD COLUMN price_cents INTEGER NOT NULL DEFAULT 0'))
+    connection.execute(text('UPDATE "order" SET price_cents = CAST(ROUND(price * 100) AS INTEGER)'))
+    connection.execute(text('ALTER TABLE "order" DROP COLUMN price'))
+
+
+@migration(2, 'Index order and message admin filters')
+def admin_list_indexes(connection):
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_created_at_id ON "order" (created_at, id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_status_created_at ON "order" (status, created_at, id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_contact_message_created_at_id ON contact_message (created_at, id)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_contact_message_read_created_at ON contact_message (read, created_at, id)'))
+
+
+@migration(3, 'Store generated logo variants')
+def logo_variants(connection):
+    if 'logo_variants' not in _columns(connection, 'site_settings'):
+        connection.execute(text('ALTER TABLE site_settings ADD COLUMN logo_variants TEXT'))
+
+
+@migration(4, 'Store the transcoded background music stream')
+def music_stream_path(connection):
+    if 'music_stream_path' not in _columns(connection, 'site_settings'):
+        connection.execute(text('ALTER TABLE site_settings ADD COLUMN music_stream_path VARCHAR(200)'))
+
+
+@migration(5, 'Build full-text search indexes for orders and messages')
+def search_indexes(connection):
+    # Other databases fall back to LIKE queries, so there is nothing to create
+    if connection.dialect.name != 'sqlite' or not fts5_available(connection):
+        return
+    for spec in SEARCH_INDEXES.values():
+        create_index(connection, spec)
+
+
+@migration(6, 'Deduplicate order submissions by idempotency key')
+def order_idempotency_key(connection):
+    if 'idempotency_key' not in _columns(connection, 'order'):
+        connection.execute(text('ALTER TABLE "order" ADD COLUMN idempotency_key VARCHAR(64)'))
+    connection.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_order_idempotency_key ON "order" (idempotency_key)'
+    ))
+
+
+@migration(7, 'Reset order stats counters maintained only while enabled')
+def reset_order_stats(connection):
+    # Counters used to be skipped while ORDER_STATS_COUNTERS was off, so they may be
+    # stale; init_db rebuilds the emptied table from the orders
+    connection.execute(text('DELETE FROM order_stats'))
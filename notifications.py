@@ -0,0 +1,150 @@
+"""Notification senders and the outbox worker thread
+
+The app writes one outbox row per channel in the same transaction as the order
+or contact message; OutboxWorker then calls a drain function that delivers due
+rows through the senders defined here.
+"""
+import json
+import logging
+import smtplib
+import threading
+import urllib.request
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationError(Exception):
+    pass
+
+
+class StubSender:
+    """Records payloads in memory instead of delivering them; fails the first `fail_times` sends"""
+
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+
+    def send(self, payload):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise NotificationError('Stub failure')
+        self.sent.append(payload)
+        logger.info('Stub notification: %s', payload.get('subject'))
+
+
+class WebhookSender:
+    """POSTs the payload as JSON to a URL"""
+
+    def __init__(self, url, token=None, timeout=10):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+
+    def _post(self, body):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        try:
+            req = urllib.request.Request(self.url, data=json.dumps(body).encode('utf-8'), headers=headers, method='POST')
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                if response.status >= 300:
+                    raise NotificationError(f'{self.url} returned {response.status}')
+        except (OSError, ValueError) as e:  # ValueError: malformed URL
+            raise NotificationError(str(e)) from e
+
+    def send(self, payload):
+        self._post(payload)
+
+
+class WhatsAppSender(WebhookSender):
+    """Sends the message text through an HTTP WhatsApp gateway"""
+
+    def __init__(self, url, to, token=None, timeout=10):
+        super().__init__(url, token=token, timeout=timeout)
+        self.to = to
+
+    def send(self, payload):
+        self._post({'to': self.to, 'message': payload['text']})
+
+
+class EmailSender:
+    """Sends the message text over SMTP"""
+
+    def __init__(self, host, port, sender, recipients, username=None, password=None, use_tls=True, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def send(self, payload):
+        message = EmailMessage()
+        message['Subject'] = payload['subject']
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content(payload['text'])
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.use_tls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                smtp.send_message(message)
+        except (OSError, smtplib.SMTPException) as e:
+            raise NotificationError(str(e)) from e
+
+
+def build_senders(config):
+    """Return {channel: sender} for every channel enabled and configured in `config`"""
+    senders = {}
+    channels = [c.strip() for c in config.get('NOTIFICATION_CHANNELS', '').split(',') if c.strip()]
+    for channel in channels:
+        if channel == 'whatsapp' and config.get('WHATSAPP_API_URL'):
+            senders[channel] = WhatsAppSender(config['WHATSAPP_API_URL'], config['WHATSAPP_NUMBER'],
+                                              token=config.get('WHATSAPP_API_TOKEN'))
+        elif channel == 'email' and config.get('SMTP_HOST') and config.get('NOTIFY_EMAIL_TO'):
+            senders[channel] = EmailSender(
+                config['SMTP_HOST'], int(config.get('SMTP_PORT', 587)),
+                config.get('NOTIFY_EMAIL_FROM') or config.get('SMTP_USERNAME'),
+                [r.strip() for r in config['NOTIFY_EMAIL_TO'].split(',')],
+                username=config.get('SMTP_USERNAME'), password=config.get('SMTP_PASSWORD')
+            )
+        elif channel == 'webhook' and config.get('NOTIFY_WEBHOOK_URL'):
+            senders[channel] = WebhookSender(config['NOTIFY_WEBHOOK_URL'], token=config.get('NOTIFY_WEBHOOK_TOKEN'))
+        elif channel == 'stub':
+            senders[channel] = StubSender()
+        else:
+            logger.warning('Notification channel %r is not configured and will be skipped', channel)
+    return senders
+
+
+def backoff_delay(attempts, base=30, cap=3600):
+    """Seconds to wait before retry number `attempts` (exponential, capped)"""
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+class OutboxWorker(threading.Thread):
+    """Daemon thread that calls `drain()` until it reports no work, then sleeps"""
+
+    def __init__(self, drain, interval=2.0):
+        super().__init__(name='outbox-worker', daemon=True)
+        self.drain = drain
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                processed = self.drain()
+            except Exception:
+                logger.exception('Outbox drain failed')
+                processed = 0
+            if not processed:
+                self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,136 @@
+"""Token-bucket rate limiting
+
+Each (route, client) pair gets a bucket that holds up to `capacity` tokens and
+refills at `rate` tokens per second; a request spends one token or is told how
+long to wait. MemoryBackend keeps buckets in the process. FileBackend keeps them
+in a small memory-mapped file guarded by flock, so every gunicorn worker on the
+host shares the same buckets without a database write per request. Both do a
+fixed amount of work per request.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows; only MemoryBackend is available
+    fcntl = None
+
+
+def _spend(tokens, updated, now, capacity, rate):
+    """Refill a bucket up to `now` and try to spend one token; return (tokens, retry_after)"""
+    tokens = min(capacity, tokens + max(now - updated, 0.0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryBackend:
+    """Buckets in a dict, limited to the `maxsize` most recently used keys"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, retry_after = _spend(tokens, updated, now, capacity, rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class FileBackend:
+    """Buckets in a memory-mapped file of fixed-size slots shared by every process on the host
+
+    A key hashes to a slot and probes the next few; when none holds the key it
+    takes an empty slot or evicts the least recently updated one, which at
+    worst hands that client a fresh bucket.
+    """
+
+    SLOT = struct.Struct('<Qdd')  # key hash, tokens, last update (unix time)
+    PROBES = 8
+
+    def __init__(self, path, slots=8192):
+        if fcntl is None:
+            raise RuntimeError('FileBackend needs fcntl')
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # flock is held per open file, so a forked worker must not reuse its parent's descriptor
+        if self._pid == os.getpid():
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = self.slots * self.SLOT.size
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        self._pid = os.getpid()
+
+    def _key_hash(self, key):
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        key_hash = self._key_hash(key)
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, tokens, updated = self._find(key_hash, capacity, now)
+                tokens, retry_after = _spend(tokens, updated, now, capacity, rate)
+                self.SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return retry_after
+
+    def _find(self, key_hash, capacity, now):
+        """Return (offset, tokens, updated) for the key's slot, claiming one if needed"""
+        victim, victim_updated = None, None
+        for probe in range(self.PROBES):
+            offset = ((key_hash + probe) % self.slots) * self.SLOT.size
+            slot_hash, tokens, updated = self.SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                return offset, tokens, updated
+            if slot_hash == 0:
+                return offset, capacity, now
+            if victim is None or updated < victim_updated:
+                victim, victim_updated = offset, updated
+        return victim, capacity, now
+
+
+class RateLimiter:
+    """Applies per-route limits of `count` requests per `period` seconds, allowing bursts of `count`"""
+
+    def __init__(self, backend, limits):
+        self.backend = backend
+        self.limits = limits
+
+    def hit(self, route, client):
+        """Spend a token for `client` on `route`; return 0 when allowed, else seconds until retry"""
+        limit = self.limits.get(route)
+        if not limit:
+            return 0.0
+        count, period = limit
+        return self.backend.take(f'{route}:{client}', count, count / period)
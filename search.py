@@ -0,0 +1,80 @@
+"""Full-text search indexes for orders and contact messages
+
+On SQLite each searchable table has an FTS5 table holding a copy of its text
+columns under the same rowid. The app keeps the copy in sync from ORM events
+(and explicitly from bulk statements, which skip those events). Queries match
+every term as a prefix and are ranked with bm25, weighted towards names.
+"""
+from sqlalchemy import text
+
+SEARCH_INDEXES = {
+    'order': {
+        'table': 'order_search',
+        'source': '"order"',
+        'columns': ('customer_name', 'email', 'phone', 'product_name', 'notes'),
+        'weights': (10.0, 5.0, 5.0, 2.0, 1.0),
+    },
+    'contact_message': {
+        'table': 'message_search',
+        'source': 'contact_message',
+        'columns': ('name', 'email', 'subject', 'message'),
+        'weights': (10.0, 5.0, 3.0, 1.0),
+    },
+}
+
+
+def fts5_available(connection):
+    try:
+        connection.execute(text('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)'))
+        connection.execute(text('DROP TABLE temp.fts5_probe'))
+    except Exception:
+        return False
+    return True
+
+
+def create_index(connection, spec):
+    """Create the FTS5 table for `spec` and fill it from the source table"""
+    columns = ', '.join(spec['columns'])
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {spec['table']} USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+    ))
+    connection.execute(text(f"DELETE FROM {spec['table']}"))
+    connection.execute(text(
+        f"INSERT INTO {spec['table']} (rowid, {columns}) SELECT id, {columns} FROM {spec['source']}"
+    ))
+
+
+def index_rows(connection, spec, rows):
+    """(Re)index `rows`, each a mapping with 'id' and the spec's columns"""
+    if not rows:
+        return
+    columns = ', '.join(spec['columns'])
+    placeholders = ', '.join(f':{column}' for column in spec['columns'])
+    delete_rows(connection, spec, [row['id'] for row in rows])
+    connection.execute(text(f"INSERT INTO {spec['table']} (rowid, {columns}) VALUES (:id, {placeholders})"),
+                       [dict(row) for row in rows])
+
+
+def delete_rows(connection, spec, ids):
+    if ids:
+        connection.execute(text(f"DELETE FROM {spec['table']} WHERE rowid = :id"), [{'id': i} for i in ids])
+
+
+def search_terms(query):
+    """Split a search box string into terms, dropping empty ones"""
+    return [term for term in (query or '').split() if term.strip('"*')]
+
+
+def match_expression(terms):
+    """Build an FTS5 query that requires every term, each as a prefix"""
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_ids(connection, spec, terms, limit, offset=0):
+    """Return up to `limit` matching rowids, best match first"""
+    weights = ', '.join(str(weight) for weight in spec['weights'])
+    rows = connection.execute(text(
+        f"SELECT rowid FROM {spec['table']} WHERE {spec['table']} MATCH :match "
+        f"ORDER BY bm25({spec['table']}, {weights}) LIMIT :limit OFFSET :offset"
+    ), {'match': match_expression(terms), 'limit': limit, 'offset': offset})
+    return [row[0] for row in rows]
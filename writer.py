@@ -0,0 +1,77 @@
+"""Group commit for small write transactions
+
+GroupCommitWriter runs write jobs submitted by request threads on a single
+thread. It waits up to `max_wait` seconds after the first job for more to
+arrive, then hands the batch to `commit_batch`, which runs them in one
+transaction. The expensive part of a small SQLite write is the commit (fsync),
+so one commit per batch instead of one per request raises throughput under
+bursts, at the price of at most `max_wait` added latency.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter(threading.Thread):
+    """Daemon thread that batches submitted jobs
+
+    `commit_batch(calls)` gets a list of (job, args) and must return one
+    (ok, value) pair per call: the job's result, or the exception it raised.
+    If it raises instead, every job in the batch fails with that exception.
+    """
+
+    def __init__(self, commit_batch, max_batch=64, max_wait=0.005):
+        super().__init__(name='group-commit-writer', daemon=True)
+        self.commit_batch = commit_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+
+    def submit(self, job, *args):
+        """Queue `job(*args)`; the returned Future resolves once its batch has committed"""
+        future = Future()
+        self._queue.put((job, args, future))
+        return future
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                outcomes = self.commit_batch([(job, args) for job, args, _ in batch])
+            except Exception as e:
+                logger.exception('Group commit of %d jobs failed', len(batch))
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), (ok, value) in zip(batch, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)